@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import shutil
+
+patterns = ["dag", "diamond", "cycle"]
+
+def library_rpath(index, depth):
+    # libraries are leaves of a tree with up to 10 children per folder, for example G2_1/G1_12/L123 with depth 3
+    folders = [f"G{level}_{index // 10 ** level}" for level in range(depth - 1, 0, -1)]
+    return os.path.join(*folders, f"L{index}")
+
+def filler(lines, prefix):
+    # code, comments and string literals so the include parser has something to skip (prefix keeps the names unique)
+    content = ""
+    for i in range(lines // 5):
+        content += f"// line comment {prefix} {i}\n"
+        content += "/* block comment\n   #include \"not_included.h\" */\n"
+        content += f"inline int {prefix}_f{i}(int x) {{ return x * {i}; }}\n"
+        content += f"static const char* {prefix}_s{i} = \"#include <not_included>\";\n"
+    return content
+
+def generate(root, libraries=100, depth=2, files=4, fanout=3, header_only=0.25, pattern="dag", lines=50, seed=0):
+    """
+    writes a synthetic project under root (see the README for the expected project structure)
+
+    libraries: number of library directories
+    depth: nesting depth of the library directories
+    files: headers per library, the first header_only ratio of them have no source file
+    fanout: project headers included by each file (from the same or from earlier libraries)
+    pattern: dag - random includes pointing to earlier headers only
+             diamond - every file also includes the same header of the two previous libraries
+             cycle - the header-only files of each library include each other in a ring
+    lines: filler lines per file
+    """
+    rng = random.Random(seed)
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    rpaths = [library_rpath(i, depth) for i in range(libraries)]
+    num_header_only = int(files * header_only)
+    for i, rpath in enumerate(rpaths):
+        include_dir = os.path.join(root, rpath, "include", rpath)
+        src_dir = os.path.join(root, rpath, "src")
+        os.makedirs(include_dir)
+        os.makedirs(src_dir)
+        for j in range(files):
+            includes = []
+            for _ in range(fanout):
+                # earlier headers of the same library or any header of an earlier library keep the graph acyclic
+                if i == 0 or (j > 0 and rng.random() < 0.5):
+                    if j > 0:
+                        includes.append(f"f{rng.randrange(j)}.h")
+                else:
+                    includes.append(f"{rpaths[rng.randrange(i)]}/f{rng.randrange(files)}.h")
+            if pattern == "diamond":
+                includes += [f"{rpaths[k]}/f{j}.h" for k in (i - 1, i - 2) if k >= 0]
+            if pattern == "cycle" and j < num_header_only and num_header_only > 1:
+                includes.append(f"f{(j + 1) % num_header_only}.h")
+            header = "#pragma once\n#include <vector>\n"
+            header += "".join(f'#include "{include}"\n' for include in sorted(set(includes)))
+            with open(os.path.join(include_dir, f"f{j}.h"), 'w') as f:
+                f.write(header + "\n" + filler(lines, f"l{i}_h{j}"))
+            if j >= num_header_only:
+                with open(os.path.join(src_dir, f"f{j}.cpp"), 'w') as f:
+                    f.write(f'#include "f{j}.h"\n#include <string>\n\n' + filler(lines, f"l{i}_s{j}"))
+    return rpaths
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--output', type=str, required=True, help="root directory of the generated project (overwritten)")
+    argparser.add_argument('--libraries', type=int, required=False, default=100, help="number of library directories")
+    argparser.add_argument('--depth', type=int, required=False, default=2, help="nesting depth of the library directories")
+    argparser.add_argument('--files', type=int, required=False, default=4, help="headers per library")
+    argparser.add_argument('--fanout', type=int, required=False, default=3, help="project includes per file")
+    argparser.add_argument('--header_only', type=float, required=False, default=0.25, help="ratio of headers without source file")
+    argparser.add_argument('--pattern', type=str, required=False, choices=patterns, default="dag", help="include pattern")
+    argparser.add_argument('--lines', type=int, required=False, default=50, help="filler lines per file")
+    argparser.add_argument('--seed', type=int, required=False, default=0, help="random seed")
+    args = vars(argparser.parse_args())
+
+    output = args.pop("output")
+    generate(output, **args)
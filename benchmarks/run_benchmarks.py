@@ -0,0 +1,117 @@
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import make_project
+
+# generator runs measured for each project size
+# cold: empty build directory, warm: every library is regenerated from the include cache, noop: --incremental without changes
+scenarios = ["cold", "warm", "noop"]
+
+def run_generator(root, extra_args):
+    timings_path = os.path.join(root, "build", "timings.json")
+    command = [sys.executable, os.path.join(root, "scripts", "generate_cmake.py"), "--timings", timings_path] + extra_args
+    start = time.perf_counter()
+    subprocess.run(command, cwd=root, check=True, stdout=subprocess.DEVNULL)
+    wall = time.perf_counter() - start
+    with open(timings_path, 'r') as f:
+        timings = json.load(f)
+    timings["wall"] = wall
+    return timings
+
+def run_size(root, scripts, libraries, project_args, generator_args, repeat):
+    make_project.generate(root, libraries=libraries, **project_args)
+    os.symlink(os.path.abspath(scripts), os.path.join(root, "scripts"))
+    results = []
+    for scenario in scenarios:
+        best = None
+        for _ in range(repeat):
+            if scenario == "cold":
+                shutil.rmtree(os.path.join(root, "build"), ignore_errors=True)
+            extra_args = generator_args + (["--incremental"] if scenario == "noop" else [])
+            timings = run_generator(root, extra_args)
+            if best is None or timings["wall"] < best["wall"]:
+                best = timings
+        best.update({"libraries": libraries, "scenario": scenario})
+        results.append(best)
+    return results
+
+def scaling(results):
+    # exponent of the fitted power law t ~ n^k between the smallest and the largest project for each scenario
+    # k close to 1 means near-linear scaling
+    exponents = {}
+    for scenario in scenarios:
+        points = sorted((r["libraries"], r["wall"]) for r in results if r["scenario"] == scenario)
+        if len(points) > 1 and points[0][0] != points[-1][0]:
+            (n1, t1), (n2, t2) = points[0], points[-1]
+            exponents[scenario] = math.log(t2 / t1) / math.log(n2 / n1)
+    return exponents
+
+def print_table(results):
+    phases = sorted({phase for r in results for phase in r["phases"]})
+    print(f"{'libraries':>10} {'scenario':>8} {'wall':>8} " + " ".join(f"{phase:>8}" for phase in phases) + f" {'rss MB':>8}")
+    for r in results:
+        rss = r["peak_rss_kb"]
+        rss = f"{max(rss.values()) / 1024:8.1f}" if rss else f"{'-':>8}"
+        row = f"{r['libraries']:>10} {r['scenario']:>8} {r['wall']:8.3f} "
+        row += " ".join(f"{r['phases'].get(phase, 0.0):8.3f}" for phase in phases)
+        print(row + " " + rss)
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--sizes', type=str, required=False, default="100,1000", help="comma separated library counts")
+    argparser.add_argument('--depth', type=int, required=False, default=2, help="nesting depth of the library directories")
+    argparser.add_argument('--files', type=int, required=False, default=4, help="headers per library")
+    argparser.add_argument('--fanout', type=int, required=False, default=3, help="project includes per file")
+    argparser.add_argument('--header_only', type=float, required=False, default=0.25, help="ratio of headers without source file")
+    argparser.add_argument('--pattern', type=str, required=False, choices=make_project.patterns, default="dag", help="include pattern")
+    argparser.add_argument('--lines', type=int, required=False, default=50, help="filler lines per file")
+    argparser.add_argument('--seed', type=int, required=False, default=0, help="random seed")
+    argparser.add_argument('--jobs', type=int, required=False, default=1, help="passed to generate_cmake.py")
+    argparser.add_argument('--repeat', type=int, required=False, default=1, help="runs per scenario, the fastest one is reported")
+    argparser.add_argument('--scripts', type=str, required=False, default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "liba", "scripts"), help="scripts folder of the generator to measure")
+    argparser.add_argument('--workdir', type=str, required=False, default=None, help="directory of the synthetic projects (kept), a temporary directory is used by default")
+    argparser.add_argument('--output', type=str, required=False, default=None, help="write the results to this JSON file")
+    argparser.add_argument('--max_exponent', type=float, required=False, default=None, help="fail if the scaling exponent of a scenario exceeds this value")
+    args = vars(argparser.parse_args())
+
+    project_args = {k: args[k] for k in ("depth", "files", "fanout", "header_only", "pattern", "lines", "seed")}
+    generator_args = ["--jobs", str(args["jobs"])]
+    sizes = [int(size) for size in args["sizes"].split(",")]
+
+    workdir = args["workdir"] or tempfile.mkdtemp(prefix="cmakegen-bench-")
+    results = []
+    try:
+        for size in sizes:
+            root = os.path.join(workdir, f"project_{size}")
+            print(f"benchmarking {size} libraries ...", file=sys.stderr)
+            results += run_size(root, args["scripts"], size, project_args, generator_args, args["repeat"])
+    finally:
+        if args["workdir"] is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    exponents = scaling(results)
+    print_table(results)
+    for scenario, exponent in exponents.items():
+        print(f"scaling exponent ({scenario}): {exponent:.2f}")
+
+    if args["output"]:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "project": project_args,
+            "jobs": args["jobs"],
+            "results": results,
+            "scaling_exponents": exponents
+        }
+        with open(args["output"], 'w') as f:
+            f.write(json.dumps(report, indent=2, sort_keys=True))
+
+    if args["max_exponent"] is not None and any(exponent > args["max_exponent"] for exponent in exponents.values()):
+        sys.exit(1)
@@ -1,13 +1,22 @@
 #include "A/AB/ABA/aba.h"
 #include "A/AA/AAB/aab.h"
 #include "build_info.h"
+#include <vector>
+#include "A/AA/AAA/aaa_export.h"
 #ifdef USE_B_BA
     #include "B/BA/ba.h"
 #endif
 
-double mySqrt(double n);
+A_AA_AAA_AAA_EXPORT double mySqrt(double n);
 
-struct AAA{
+// cpu bound work without python objects (see python/test_threads.py)
+A_AA_AAA_AAA_EXPORT double myIntegral(long long steps);
+
+// array arguments, numpy arrays are passed without copying with --swig_numpy (see python/bench_numpy.py)
+A_AA_AAA_AAA_EXPORT double mySum(const double* values, int size);
+A_AA_AAA_AAA_EXPORT double mySumVector(const std::vector<double>& values);
+
+struct A_AA_AAA_AAA_EXPORT AAA{
     static void print();
 
     // test C++17 feature
@@ -1,3 +1,4 @@
-struct AAA2{
+#include "A/AA/AAA/aaa2_export.h"
+struct A_AA_AAA_AAA2_EXPORT AAA2{
     static void print();
 };
\ No newline at end of file
@@ -9,6 +9,27 @@ double mySqrt(double n){
     return sqrt(n);
 }
 
+double myIntegral(long long steps){
+    // integral of sqrt over [0, 1] with the midpoint rule
+    double sum = 0.0;
+    for(long long i = 0; i < steps; ++i){
+        sum += sqrt((i + 0.5) / steps);
+    }
+    return sum / steps;
+}
+
+double mySum(const double* values, int size){
+    double sum = 0.0;
+    for(int i = 0; i < size; ++i){
+        sum += values[i];
+    }
+    return sum;
+}
+
+double mySumVector(const std::vector<double>& values){
+    return mySum(values.data(), values.size());
+}
+
 void AAA::print(){
     cout << "AAA" << endl;
     ABA::print();
@@ -7,4 +7,7 @@
 #include "aaa.h"
 %}
 
+%include "std_vector.i"
+%template(DoubleVector) std::vector<double>;
+
 %include "aaa.h"
\ No newline at end of file
@@ -1,5 +1,6 @@
 #include "A/AA/AAA/aaa2.h"
+#include "A/AA/AAB/aab_export.h"
 
-struct AAB{
+struct A_AA_AAB_AAB_EXPORT AAB{
     static void print();
 };
\ No newline at end of file
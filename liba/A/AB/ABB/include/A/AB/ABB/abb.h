@@ -1,3 +1,4 @@
-struct ABB{
+#include "A/AB/ABB/abb_export.h"
+struct A_AB_ABB_ABB_EXPORT ABB{
     static void print();
 };
\ No newline at end of file
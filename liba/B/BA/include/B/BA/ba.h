@@ -1,5 +1,6 @@
 #include "ba2.h"
+#include "B/BA/ba_export.h"
 
-struct BA{
+struct B_BA_BA_EXPORT BA{
     static void print();
 };
\ No newline at end of file
@@ -1,5 +1,6 @@
 #include "ba3.h"
+#include "B/BA/ba2_export.h"
 
-struct BA2{
+struct B_BA_BA2_EXPORT BA2{
     static void print();
 };
\ No newline at end of file
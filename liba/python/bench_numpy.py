@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+import os
+import timeit
+import numpy
+sys.path.append(os.path.join(Path().parent.absolute(), "build", "python"))
+import cmake_module
+import liba.A.AA.AAA.aaa as aaa
+
+# list based calls convert every element to a C++ double, with --swig_numpy the buffer of a numpy array is passed to
+# mySum without copying (mySumVector fills the vector with a single copy)
+
+size = 1000000
+repeat = 20
+values = [float(i) for i in range(size)]
+array = numpy.array(values)
+
+def bench(name, call):
+    try:
+        call()
+    except TypeError:
+        print(f"{name:<28} not supported (build the swig modules with --swig_numpy)")
+        return
+    seconds = min(timeit.repeat(call, number=1, repeat=repeat))
+    print(f"{name:<28} {seconds * 1000:10.3f} ms")
+
+print(f"sum of {size} doubles, best of {repeat} calls")
+bench("mySumVector(list)", lambda: aaa.mySumVector(values))
+bench("mySumVector(numpy array)", lambda: aaa.mySumVector(array))
+bench("mySum(list)", lambda: aaa.mySum(values))
+bench("mySum(numpy array)", lambda: aaa.mySum(array))
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(Path().parent.absolute(), "build", "python"))
+import cmake_module
+import liba.A.AA.AAA.aaa as aaa
+
+# wrapped calls run in parallel python threads if the swig modules are built with --swig_threads (they release the GIL)
+# run with --check to fail if there is no speedup
+
+steps = 20000000
+workers = min(os.cpu_count() or 1, 4)
+
+def run(num_workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        results = list(executor.map(aaa.myIntegral, [steps] * workers))
+    return time.perf_counter() - start, results
+
+serial_time, serial_results = run(1)
+parallel_time, parallel_results = run(workers)
+speedup = serial_time / parallel_time
+assert serial_results == parallel_results
+print(f"{workers} calls: serial {serial_time:.3f}s, {workers} threads {parallel_time:.3f}s, speedup {speedup:.2f}")
+
+if "--check" in sys.argv and workers > 1 and speedup < 1.5:
+    print("the wrapped calls did not run in parallel, build the swig modules with --swig_threads")
+    sys.exit(1)
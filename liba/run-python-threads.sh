@@ -0,0 +1,3 @@
+#! /bin/sh
+
+python3 python/test_threads.py --check
@@ -0,0 +1,88 @@
+import inspect
+
+# memory of a compile/link job in MiB, the number of parallel jobs is limited by the available memory
+compile_job_memory = 1024
+link_job_memory = 4096
+
+configure_script = "configure-fast.sh"
+build_script = "build-fast.sh"
+
+def cmake_content(use_pch):
+    """
+    top level CMake script of the build acceleration profile
+
+    ccache or sccache is used as compiler launcher with a cache directory in the project (.compiler_cache) so it works offline
+    and CI can keep it between runs. Compile and link jobs get separate job pools sized by the number of cores and
+    the available memory (only used by the Ninja generator, see build-fast.sh for Make)
+    """
+    # precompiled headers are only cached by ccache with these settings
+    sloppiness = " CCACHE_SLOPPINESS=pch_defines,time_macros" if use_pch else ""
+    return inspect.cleandoc(f"""
+    # build acceleration profile (configure-fast.sh, build-fast.sh)
+    # compiler cache with a local cache directory
+    find_program(COMPILER_CACHE NAMES ccache sccache)
+    set(COMPILER_CACHE_DIR "${{CMAKE_CURRENT_SOURCE_DIR}}/.compiler_cache" CACHE PATH "Directory of the compiler cache")
+    if(COMPILER_CACHE AND NOT CMAKE_CXX_COMPILER_LAUNCHER)
+      get_filename_component(COMPILER_CACHE_NAME ${{COMPILER_CACHE}} NAME_WE)
+      string(TOUPPER ${{COMPILER_CACHE_NAME}} COMPILER_CACHE_NAME)
+      # paths relative to the project root so the cache is hit from any checkout location
+      set(CMAKE_CXX_COMPILER_LAUNCHER ${{CMAKE_COMMAND}} -E env ${{COMPILER_CACHE_NAME}}_DIR=${{COMPILER_CACHE_DIR}}
+        CCACHE_BASEDIR=${{CMAKE_CURRENT_SOURCE_DIR}} CCACHE_NOHASHDIR=true{sloppiness} ${{COMPILER_CACHE}})
+      message(STATUS "Compiler cache: ${{COMPILER_CACHE}} (${{COMPILER_CACHE_DIR}})")
+    endif()
+
+    # job pools, link jobs need more memory than compile jobs so they are capped separately
+    cmake_host_system_information(RESULT HOST_CORES QUERY NUMBER_OF_LOGICAL_CORES)
+    cmake_host_system_information(RESULT HOST_MEMORY QUERY AVAILABLE_PHYSICAL_MEMORY)
+    set(COMPILE_JOB_MEMORY {compile_job_memory} CACHE STRING "Memory of a compile job in MiB")
+    set(LINK_JOB_MEMORY {link_job_memory} CACHE STRING "Memory of a link job in MiB")
+    math(EXPR COMPILE_JOBS "${{HOST_MEMORY}} / ${{COMPILE_JOB_MEMORY}}")
+    math(EXPR LINK_JOBS "${{HOST_MEMORY}} / ${{LINK_JOB_MEMORY}}")
+    if(COMPILE_JOBS GREATER HOST_CORES)
+      set(COMPILE_JOBS ${{HOST_CORES}})
+    endif()
+    if(COMPILE_JOBS LESS 1)
+      set(COMPILE_JOBS 1)
+    endif()
+    if(LINK_JOBS GREATER COMPILE_JOBS)
+      set(LINK_JOBS ${{COMPILE_JOBS}})
+    endif()
+    if(LINK_JOBS LESS 1)
+      set(LINK_JOBS 1)
+    endif()
+    set_property(GLOBAL APPEND PROPERTY JOB_POOLS compile_pool=${{COMPILE_JOBS}} link_pool=${{LINK_JOBS}})
+    set(CMAKE_JOB_POOL_COMPILE compile_pool)
+    set(CMAKE_JOB_POOL_LINK link_pool)
+    message(STATUS "Job pools: ${{COMPILE_JOBS}} compile jobs, ${{LINK_JOBS}} link jobs")
+    """)
+
+def configure_script_content():
+    # Ninja if it is installed, an existing build directory keeps its generator
+    return inspect.cleandoc("""
+    #! /bin/sh
+
+    mkdir -p build
+    if [ -f build/CMakeCache.txt ]; then
+      cmake -B build -S . "$@"
+    elif command -v ninja >/dev/null 2>&1; then
+      cmake -B build -S . -G Ninja "$@"
+    else
+      cmake -B build -S . "$@"
+    fi
+    """) + "\n"
+
+def build_script_content():
+    # parallel jobs: number of cores limited by the available memory (the job pools of Ninja cap the link jobs)
+    return inspect.cleandoc(f"""
+    #! /bin/sh
+
+    jobs=$(getconf _NPROCESSORS_ONLN 2>/dev/null || echo 1)
+    memory=$(awk '/^MemAvailable:/ {{print int($2 / 1024)}}' /proc/meminfo 2>/dev/null)
+    if [ -n "$memory" ] && [ $((memory / {compile_job_memory})) -lt "$jobs" ]; then
+      jobs=$((memory / {compile_job_memory}))
+    fi
+    if [ "$jobs" -lt 1 ]; then
+      jobs=1
+    fi
+    cmake --build build -j "$jobs" "$@"
+    """) + "\n"
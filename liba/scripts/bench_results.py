@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+
+# merges the JSON results of Google Benchmark executables and compares them with a baseline (see run-bench.sh)
+
+time_units = {"ns": 1e-9, "us": 1e-6, "ms": 1e-3, "s": 1.0}
+
+def read_results(location):
+    with open(location, 'r') as f:
+        return json.load(f)
+
+def merge(output, inputs):
+    """
+    merges the results of the executables into a single file
+
+    benchmark names are prefixed with the name of their executable, the context of the first executable is kept
+    """
+    merged = {"context": {}, "benchmarks": []}
+    for location in inputs:
+        results = read_results(location)
+        executable = os.path.splitext(os.path.basename(location))[0]
+        if not merged["context"]:
+            merged["context"] = results.get("context", {})
+        for entry in results.get("benchmarks", []):
+            entry = dict(entry)
+            entry["name"] = f"{executable}/{entry['name']}"
+            if "run_name" in entry:
+                entry["run_name"] = f"{executable}/{entry['run_name']}"
+            merged["benchmarks"].append(entry)
+    with open(output, 'w') as f:
+        json.dump(merged, f, indent=1)
+    print(f"{len(merged['benchmarks'])} results of {len(inputs)} benchmarks have been merged into {output}")
+
+def times(results):
+    """
+    cpu time in seconds of each benchmark
+
+    benchmarks run with repetitions are represented by their mean, the single runs and other aggregates are skipped
+    """
+    means = {}
+    runs = {}
+    for entry in results.get("benchmarks", []):
+        seconds = entry["cpu_time"] * time_units[entry.get("time_unit", "ns")]
+        if entry.get("run_type") == "aggregate":
+            if entry.get("aggregate_name") == "mean":
+                means[entry.get("run_name", entry["name"])] = seconds
+        else:
+            runs.setdefault(entry.get("run_name", entry["name"]), seconds)
+    runs.update(means)
+    return runs
+
+def compare(baseline, current, threshold):
+    # returns the number of regressions: benchmarks slower than the baseline by more than threshold (relative)
+    baseline_times = times(read_results(baseline))
+    current_times = times(read_results(current))
+    regressions = 0
+    width = max((len(name) for name in current_times), default=0)
+    print(f"{'benchmark':<{width}} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(current_times):
+        if not name in baseline_times:
+            print(f"{name:<{width}} {'':>12} {current_times[name] * 1e9:>10.1f}ns {'new':>9}")
+            continue
+        change = current_times[name] / baseline_times[name] - 1.0 if baseline_times[name] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<{width}} {baseline_times[name] * 1e9:>10.1f}ns {current_times[name] * 1e9:>10.1f}ns {change:>+8.1%}{flag}")
+    for name in sorted(set(baseline_times) - set(current_times)):
+        print(f"{name:<{width}} {baseline_times[name] * 1e9:>10.1f}ns {'':>12} {'missing':>9}")
+    print(f"{regressions} regressions (threshold {threshold:.1%})")
+    return regressions
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    commands = argparser.add_subparsers(dest="command")
+    merge_parser = commands.add_parser("merge", help="merge the JSON results of benchmark executables")
+    merge_parser.add_argument('output', type=str, help="merged results")
+    merge_parser.add_argument('inputs', type=str, nargs='+', help="results of the executables (<executable>.json)")
+    compare_parser = commands.add_parser("compare", help="compare results with a baseline, fails if there is a regression")
+    compare_parser.add_argument('baseline', type=str, help="baseline results")
+    compare_parser.add_argument('current', type=str, help="current results")
+    compare_parser.add_argument('--threshold', type=float, required=False, default=0.1, help="relative slowdown flagged as regression")
+    args = argparser.parse_args()
+
+    if args.command == "merge":
+        merge(args.output, args.inputs)
+    elif args.command == "compare":
+        sys.exit(1 if compare(args.baseline, args.current, args.threshold) else 0)
+    else:
+        argparser.print_help()
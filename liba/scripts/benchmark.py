@@ -0,0 +1,65 @@
+import inspect
+import re
+
+bench_script = "run-bench.sh"
+results_script = "bench_results.py"
+baseline_file = "bench_baseline.json"
+
+# linked like the libraries of scripts/extra_libs.txt (<include path without .h> -> CMake targets), only with --benchmark
+# as benchmark::benchmark is only found then
+extra_links = {"benchmark/benchmark": ["benchmark::benchmark"]}
+
+include_regex = re.compile(r'<\s*benchmark/benchmark\.h\s*>')
+# executables defining their main function do not link benchmark_main
+main_regex = re.compile(r'^\s*(?:int\s+main\s*\(|BENCHMARK_MAIN\s*\()', re.MULTILINE)
+
+def is_benchmark(includes):
+    return any(include_regex.search(include) for include in includes)
+
+def target_content(target, text):
+    # benchmark executables are built into build/bench so run-bench.sh finds every one of them
+    content = f"set_target_properties({target} PROPERTIES RUNTIME_OUTPUT_DIRECTORY ${{ROOT_BINARY_DIR}}/bench)\n"
+    if not main_regex.search(text):
+        content += f"target_link_libraries({target} PRIVATE benchmark::benchmark_main)\n"
+    return content
+
+def bench_script_content():
+    # every benchmark writes its JSON results, they are merged and compared with the baseline
+    return inspect.cleandoc(f"""
+    #! /bin/sh
+    # runs the benchmarks of build/bench and merges their results into build/bench/results.json
+    # the results are compared with {baseline_file} (BENCH_BASELINE) if it exists, a benchmark slower by more than
+    # BENCH_THRESHOLD (default 0.1, 10%) is a regression and the script fails
+    # ./{bench_script} --save-baseline stores the results as the baseline, other arguments are passed to the benchmarks
+    set -e
+
+    baseline=${{BENCH_BASELINE:-{baseline_file}}}
+    save=""
+    if [ "$1" = "--save-baseline" ]; then
+      save=1
+      shift
+    fi
+
+    mkdir -p build/bench/results
+    rm -f build/bench/results/*.json
+    for bench in build/bench/*; do
+      if [ -f "$bench" ] && [ -x "$bench" ]; then
+        name=$(basename "$bench")
+        echo "benchmark: $name"
+        "$bench" --benchmark_out="build/bench/results/$name.json" --benchmark_out_format=json "$@"
+      fi
+    done
+
+    if [ -z "$(ls build/bench/results/*.json 2>/dev/null)" ]; then
+      echo "There are no benchmark results: build/bench has no executables (apps including <benchmark/benchmark.h>), nothing to compare."
+      exit 0
+    fi
+
+    python3 scripts/{results_script} merge build/bench/results.json build/bench/results/*.json
+    if [ -n "$save" ]; then
+      cp build/bench/results.json "$baseline"
+      echo "baseline: $baseline has been saved"
+    elif [ -f "$baseline" ]; then
+      python3 scripts/{results_script} compare "$baseline" build/bench/results.json --threshold "${{BENCH_THRESHOLD:-0.1}}"
+    fi
+    """) + "\n"
@@ -0,0 +1,77 @@
+import json
+import os
+
+presets_file = "CMakePresets.json"
+preset_prefix = "build-only-"
+
+def force_options(tree, directories):
+    """
+    FORCE_BUILD and FORCE_NO_BUILD paths building exactly the given library directories
+
+    a folder inherits the build option of its parent (see resolve_options in create_cmake_options.py.in),
+    only the folders whose option differs from their parent are listed
+    """
+    build = []
+    no_build = []
+    stack = [(tree, "", True)]
+    while stack:
+        subtree, rpath, inherited = stack.pop()
+        for folder in reversed(list(subtree.keys())):
+            curr_rpath = os.path.join(rpath, folder)
+            needed = any(directory == curr_rpath or directory.startswith(curr_rpath + os.path.sep) for directory in directories)
+            if needed != inherited:
+                (build if needed else no_build).append(curr_rpath.replace(os.path.sep, "/"))
+            stack.append((subtree[folder], curr_rpath, needed))
+    return sorted(build), sorted(no_build)
+
+def force_arguments(build, no_build):
+    # arguments of configure.sh (passed to cmake)
+    return f'-DFORCE_BUILD:STRING="{" ".join(build)}" -DFORCE_NO_BUILD:STRING="{" ".join(no_build)}"'
+
+def preset_name(targets):
+    return preset_prefix + "-".join(targets)
+
+def is_generated(preset):
+    return preset.get("name", "").startswith(preset_prefix)
+
+def presets_content(location, name, build_targets, build, no_build):
+    """
+    CMakePresets.json with a configure preset setting the FORCE options and a build preset building the targets
+
+    presets with other names are kept, so one file can hold the presets of several CI jobs
+    """
+    try:
+        with open(location, 'r') as f:
+            presets = json.load(f)
+    except (OSError, ValueError):
+        presets = {}
+    # build presets with targets need presets version 3 (CMake 3.21)
+    presets["version"] = max(presets.get("version", 3), 3)
+    presets.setdefault("cmakeMinimumRequired", {"major": 3, "minor": 22, "patch": 0})
+    configure_preset = {
+        "name": name,
+        "displayName": f"Build {', '.join(build_targets)} only",
+        "binaryDir": "${sourceDir}/build",
+        "cacheVariables": {"FORCE_BUILD": " ".join(build), "FORCE_NO_BUILD": " ".join(no_build)}
+    }
+    build_preset = {"name": name, "configurePreset": name, "targets": build_targets}
+    for kind, preset in (("configurePresets", configure_preset), ("buildPresets", build_preset)):
+        presets[kind] = [other for other in presets.get(kind, []) if other.get("name") != name] + [preset]
+    return json.dumps(presets, indent=2) + "\n"
+
+def remove_presets(location):
+    # removes the presets written by presets_content (--clean), the file is deleted if it has no other presets
+    try:
+        with open(location, 'r') as f:
+            presets = json.load(f)
+    except (OSError, ValueError):
+        return
+    for kind in ("configurePresets", "buildPresets"):
+        presets[kind] = [preset for preset in presets.get(kind, []) if not is_generated(preset)]
+        if not presets[kind]:
+            del presets[kind]
+    if set(presets) - {"version", "cmakeMinimumRequired"}:
+        with open(location, 'w') as f:
+            f.write(json.dumps(presets, indent=2) + "\n")
+    else:
+        os.remove(location)
@@ -0,0 +1,98 @@
+class DependencyGraph:
+    """
+    include graph of the whole project
+
+    nodes are created once from get_node(key) which returns (contributions, successors):
+    contributions: dictionary of sets collected from the node itself (linked libraries, include dirs etc.)
+    successors: keys of the nodes whose contributions are inherited (header-only includes)
+
+    the closure of a node is the union of the contributions of every node reachable from it. Closures are
+    computed on the strongly connected components of the graph so include cycles (header-only dependency cycles made
+    possible with forward declarations) are handled structurally instead of cutting the search on the current path.
+    Each closure is computed once and shared by every target reaching the node.
+    """
+
+    def __init__(self, get_node):
+        self.get_node = get_node
+        self.nodes = {}
+        # key -> closure (dictionary of frozensets), nodes of the same component share the same closure
+        self.closures = {}
+        # deepest include chain walked by resolve (the recursion depth of a recursive search)
+        self.max_depth = 0
+
+    def node(self, key):
+        if key not in self.nodes:
+            self.nodes[key] = self.get_node(key)
+        return self.nodes[key]
+
+    def invalidate(self, keys=None):
+        # drops the nodes of changed files (every node if keys is None), closures are shared so all of them are computed again
+        if keys is None:
+            self.nodes = {}
+        for key in keys or ():
+            self.nodes.pop(key, None)
+        self.closures = {}
+
+    def closure(self, key):
+        if key not in self.closures:
+            self.resolve(key)
+        return self.closures[key]
+
+    def resolve(self, root):
+        # iterative Tarjan algorithm, components are completed in reverse topological order
+        # so the closures of the successor components are always available
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        work = [(root, iter(self.node(root)[1]))]
+        self.max_depth = max(self.max_depth, 1)
+        index[root] = lowlink[root] = 0
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            key, successors = work[-1]
+            descended = False
+            for successor in successors:
+                if successor in self.closures:
+                    continue
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(self.node(successor)[1])))
+                    self.max_depth = max(self.max_depth, len(work))
+                    descended = True
+                    break
+                elif successor in on_stack:
+                    lowlink[key] = min(lowlink[key], index[successor])
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[key])
+            if lowlink[key] == index[key]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == key:
+                        break
+                self.close_component(component)
+
+    def close_component(self, component):
+        members = set(component)
+        closure = {}
+        for member in component:
+            contributions, successors = self.node(member)
+            for k, v in contributions.items():
+                closure.setdefault(k, set()).update(v)
+            for successor in successors:
+                if successor not in members:
+                    for k, v in self.closures[successor].items():
+                        closure.setdefault(k, set()).update(v)
+        closure = {k: frozenset(v) for k, v in closure.items()}
+        for member in component:
+            self.closures[member] = closure
@@ -1,12 +1,20 @@
 import sys
+from include_cache import IncludeCache, read_entry
+from dependency_graph import DependencyGraph
+from manifest import Manifest, content_hash
+import project_scanner
 import parse_includes
-import glob, os
+from profiling import PhaseTimer
+import os
 import re
 import inspect
 import textwrap
 import traceback
 import argparse
 import shutil
+import time
+import concurrent.futures
+import multiprocessing
 
 argparser = argparse.ArgumentParser()
 
@@ -14,49 +22,120 @@ argparser.add_argument('--clean', action='store_true', required=False, default=F
 
 argparser.add_argument('--swig_python', action='store_true', required=False, default=False, help="generating python-swig content")
 
+argparser.add_argument('--swig_threads', action='store_true', required=False, default=False, help="release the GIL in the wrapped calls of the swig modules (swig -threads)")
+
+argparser.add_argument('--swig_builtin', action='store_true', required=False, default=False, help="build the swig modules with builtin python types (swig -builtin)")
+
+argparser.add_argument('--swig_fast', action='store_true', required=False, default=False, help="build the swig modules with -fastdispatch and -O")
+
+argparser.add_argument('--swig_numpy', action='store_true', required=False, default=False, help="numpy typemaps for the array parameters of the wrapped functions (pointer + length, const std::vector&)")
+
 argparser.add_argument('--qt', action='store_true', required=False, default=False, help="support Qt project")
 
 argparser.add_argument('--googletest', action='store_true', required=False, default=False, help="add googletest")
 
+argparser.add_argument('--benchmark', action='store_true', required=False, default=False, help="add Google Benchmark, executables including benchmark/benchmark.h are built into build/bench (run-bench.sh)")
+
+argparser.add_argument('--lib_granularity', type=str, required=False, choices=["file", "directory", "object"], default="file", help="shared library per source file, per library directory or a single shared library from object libraries")
+
+argparser.add_argument('--unity', action='store_true', required=False, default=False, help="enable unity (jumbo) builds of the targets with several source files")
+
+argparser.add_argument('--unity_batch_size', type=int, required=False, default=8, help="maximum number of source files merged into one unity source file")
+
+argparser.add_argument('--pch', action='store_true', required=False, default=False, help="precompile the headers reached by most translation units of each library directory")
+
+argparser.add_argument('--pch_count', type=int, required=False, default=5, help="maximum number of precompiled headers of a library directory")
+
+argparser.add_argument('--hidden_visibility', action='store_true', required=False, default=False, help="hide the symbols of the libraries which are not exported with the macros of the generated <source>_export.h headers")
+
+argparser.add_argument('--accelerate', action='store_true', required=False, default=False, help="build acceleration profile: Ninja, compiler cache and job pools (configure-fast.sh, build-fast.sh)")
+
+argparser.add_argument('--ipo', action='store_true', required=False, default=False, help="interprocedural (link time) optimization of the Release builds")
+
+argparser.add_argument('--pgo', action='store_true', required=False, default=False, help="profile guided optimization workflow (pgo.sh)")
+
+argparser.add_argument('--header_report', action='store_true', required=False, default=False, help="write the header cost analysis to build/header_report.json and build/header_report.txt")
+
+argparser.add_argument('--target_graph', action='store_true', required=False, default=False, help="write the target graph with its critical path to build/target_graph.dot, .json and .txt")
+
 argparser.add_argument('--cpp_version', type=int, required=False, choices = [11, 14, 17], default=17, help="C++ version, 11, 14 or 17")
 
+argparser.add_argument('--no_cache', action='store_true', required=False, default=False, help="do not use the persistent include cache")
+
+argparser.add_argument('--cache_stats', action='store_true', required=False, default=False, help="print include cache statistics")
+
+argparser.add_argument('--include_preamble', action='store_true', required=False, default=False, help="stop parsing the files at the end of their include preamble")
+
+argparser.add_argument('--incremental', action='store_true', required=False, default=False, help="regenerate only the libraries whose inputs changed")
+
+argparser.add_argument('--build_only', type=str, nargs='+', required=False, default=None, help="targets to build (for example liba.A.AA.AAA.main), writes the FORCE options of their library directories to a preset of CMakePresets.json")
+
+argparser.add_argument('--watch', action='store_true', required=False, default=False, help="keep running and regenerate the affected files whenever a project file changes")
+
+argparser.add_argument('--watch_interval', type=float, required=False, default=0.5, help="seconds between two checks of the polling watcher (--watch), inotify waits this long for the end of a save")
+
+argparser.add_argument('--watch_polling', action='store_true', required=False, default=False, help="poll the mtimes of the project files instead of using inotify (--watch)")
+
+argparser.add_argument('--jobs', type=int, required=False, default=1, help="number of processes generating library directories, 0 uses every core")
+
+argparser.add_argument('--timings', type=str, required=False, default=None, help="write the time spent in each phase and the peak memory usage to this JSON file")
+
+argparser.add_argument('--profile', action='store_true', required=False, default=False, help="print phase timings, the slowest library directories and counters")
+
+argparser.add_argument('--trace', type=str, required=False, default=None, help="write a Chrome trace event file of the generation")
+
 args = vars(argparser.parse_args())
 
 cmake_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 use_swig_python = args["swig_python"]
+swig_flags = []
+use_swig_numpy = use_swig_python and args["swig_numpy"]
+if use_swig_numpy: import numpy_typemaps
+if use_swig_python and (args["swig_threads"] or args["swig_builtin"] or args["swig_fast"]):
+    import swig_options
+    swig_flags = swig_options.swig_flags(args["swig_threads"], args["swig_builtin"], args["swig_fast"])
 use_qt = args["qt"]
 use_googletest = args["googletest"]
+use_benchmark = args["benchmark"]
+if use_benchmark: import benchmark
 if use_qt: import qt
+use_unity = args["unity"]
+lib_granularity = args["lib_granularity"]
+use_pch = args["pch"]
+if use_pch or args["header_report"] or args["target_graph"]: import pch
+if args["header_report"]: import header_report
+if args["target_graph"]: import target_graph
+use_hidden_visibility = args["hidden_visibility"]
+use_accelerate = args["accelerate"]
+if use_accelerate: import accelerate
+use_ipo = args["ipo"]
+use_pgo = args["pgo"]
+if use_ipo or use_pgo: import optimize
+if use_unity: import unity
+if use_swig_python: import python_package
+if args["watch"]: import watch
+# --clean removes the presets written by --build_only
+import build_only
 cpp_version = args["cpp_version"]
+jobs = args["jobs"] if args["jobs"] > 0 else os.cpu_count()
+
+# phase timings of the run (see --timings), spans of single operations are only recorded with --profile or --trace
+timer = PhaseTimer(args["profile"] or args["trace"] is not None)
+
+# parsed include lists are cached between runs, only new or changed files are parsed again
+cache_dir = os.path.join(cmake_root, "build", ".cmakegen")
+include_cache = IncludeCache(None if args["no_cache"] else os.path.join(cache_dir, "includes.json"), args["include_preamble"])
 
-def determine_project_folders():
-    # search in folders to generate CMakeLists.txt files
-    folders = {name for name in os.listdir(cmake_root) if os.path.isdir(os.path.join(cmake_root, name))}
-    hidden_folders = {os.path.basename(p) for p in glob.glob(os.path.join(cmake_root, ".*"))}
-    # special folder names (see README)
-    folders.discard("external")
-    folders.discard("build")
-    folders.discard("scripts")
-    folders.discard("python")
-    folders.discard("apps")
-    folders.discard("cmake")
-    return list(folders - hidden_folders)
-
-subdirs = determine_project_folders()
+# the project layout is scanned once, excluded directories (external, hidden and .cmakegenignore) are not visited
+with timer.phase("scan"):
+    project = project_scanner.scan(cmake_root)
+
+subdirs = project["folders"]
 
 def get_lib_dirs():
-    # find root directories with the C++ source and header files
-    lib_dirs = []
-    for dir in subdirs:
-        lib_dirs.extend([os.path.relpath(path, cmake_root)[:-8] 
-        for path in glob.glob(os.path.join(cmake_root, dir, "**", "include"), recursive=True)
-        if not os.path.sep + "external" + os.path.sep in path])
-    for dir in subdirs:
-        lib_dirs.extend([os.path.relpath(path, cmake_root)[:-5] 
-        for path in glob.glob(os.path.join(cmake_root, dir, "**", "apps"), recursive=True)
-        if not os.path.sep + "external" + os.path.sep in path and not os.path.relpath(path, cmake_root)[:-5] in lib_dirs])
-    return lib_dirs
+    # root directories with the C++ source and header files
+    return project["lib_dirs"]
 
 def buildTree(dirs):
     # builds project directory tree
@@ -93,12 +172,20 @@ def remove_extension(path):
 
 def get_file_names(rpath):
     # returns list of source file names
-    res = []
-    if os.path.exists(os.path.join(cmake_root, rpath, "src")):
-        res = [remove_extension(p) for p in os.listdir(os.path.join(cmake_root, rpath, "src"))]
-    if os.path.exists(os.path.join(cmake_root, rpath, "apps")):
-        res += [remove_extension(p) for p in os.listdir(os.path.join(cmake_root, rpath, "apps"))]
-    return  res
+    library = project["libraries"][rpath]
+    return sorted(remove_extension(p) for p in library["src"] + library["apps"])
+
+def library_files(rpath, folder, extension):
+    # sorted files of a library folder (src, apps, swig or include) with the extension, relative to the library directory
+    library = project["libraries"][rpath]
+    prefix = os.path.join("include", rpath) if folder == "include" else folder
+    return [f"{prefix}/{name}".replace(os.path.sep, "/") for name in library[folder] if name.endswith(extension)]
+
+def files_content(variable, files):
+    # explicit file list instead of file(GLOB) so CMake does not rescan the folders (the generator tracks the project files)
+    if not files:
+        return f'set({variable} "")'
+    return f"set({variable}\n" + "".join(f"  {file}\n" for file in files) + ")"
 
 def include_to_rpath(include):
     return os.path.sep.join(include.split("/")[:-1])
@@ -106,6 +193,21 @@ def include_to_rpath(include):
 def include_to_name(include):
     return include.split("/")[-1]
 
+def write_if_changed(path, content):
+    # keep the file untouched (and its mtime) if the content is the same so CMake does not reconfigure
+    try:
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    with open(path, 'w') as f:
+        f.write(content)
+    return True
+
+# lines of build_info.h.in and build_info_install.h.in
+build_info = {False: [], True: []}
+
 def add_to_build_info(prefix, install):
     """
     a header file will be generated with cmake macros of the format:
@@ -117,18 +219,20 @@ def add_to_build_info(prefix, install):
 
     these macros can be included to other source files to access build information
     """
-    str_install = "_install" if install else ""
-    os.umask(0)
-    os.makedirs(os.path.join(cmake_root, "build", "include"), mode=0o777, exist_ok=True)
-    location = os.path.join(cmake_root, "build", "include", f"build_info{str_install}.h.in")
-    # C++ comment with //
-    content = ""
     macro = "_".join(prefix.upper().split(os.path.sep))
     project_name = cmake_root.split(os.path.sep)[-1]
     str_project_name = f"{project_name}_" if install else ""
-    content += f"#cmakedefine USE_{str_project_name}{macro}\n"
-    with open(location, 'a') as f:
-        f.write(content)
+    build_info[install].append(f"#cmakedefine USE_{str_project_name}{macro}\n")
+
+def write_build_info():
+    os.umask(0)
+    os.makedirs(os.path.join(cmake_root, "build", "include"), mode=0o777, exist_ok=True)
+    written = False
+    for install, lines in build_info.items():
+        str_install = "_install" if install else ""
+        location = os.path.join(cmake_root, "build", "include", f"build_info{str_install}.h.in")
+        written |= write_if_changed(location, "".join(lines))
+    return written
 
 def header_content():
     return f"cmake_minimum_required (VERSION 3.22.0)\n\n"
@@ -136,6 +240,53 @@ def header_content():
 def path_to_ns(postfix):
     return '.'.join(postfix.split(os.path.sep)) + '.'
 
+def export_prefix(postfix):
+    # export macros of src/<name>.cpp are <EXPORT_PREFIX>_<NAME>_EXPORT (see export_header_content)
+    return "_".join(postfix.upper().split(os.path.sep))
+
+def export_header_content(target, postfix, indent):
+    # export macros of a library: #include "<postfix>/<name>.h" -> <postfix>/<name>_export.h, generated in the build include directory
+    return inspect.cleandoc(f"""
+    generate_export_header({target}
+      BASE_NAME {export_prefix(postfix)}_${{NAME}}
+      EXPORT_FILE_NAME ${{ROOT_BINARY_DIR}}/include/{postfix}/${{NAME}}_export.h)
+    """).replace("\n", "\n" + " " * indent)
+
+def export_names(postfix):
+    """
+    sources of a library with a <name>_export.h in the build include directory
+
+    every source gets one with --hidden_visibility (see export_header_content), otherwise only the sources whose export
+    header is included by the library get a header with the macros defined empty (see fallback_export_content)
+    """
+    names = [remove_extension(os.path.basename(source)) for source in library_files(postfix, "src", ".cpp")]
+    if use_hidden_visibility:
+        return names
+    included = set()
+    for file in library_files(postfix, "include", ".h") + library_files(postfix, "src", ".cpp"):
+        for incl in include_cache.find_includes(os.path.join(cmake_root, postfix, file)):
+            if not '"' in incl:
+                continue
+            include = incl.split('"')[1][:-2]
+            if (is_local(include) or include_to_rpath(include) == postfix) and is_export_header(postfix, include):
+                included.add(include_to_name(include)[:-len("_export")])
+    return [name for name in names if name in included]
+
+def fallback_export_content(postfix):
+    # export headers included by the library without --hidden_visibility, nothing is hidden so the macros are defined empty
+    names = export_names(postfix)
+    if not names:
+        return ""
+    macros = "".join(f"#define @EXPORT_BASE@_{suffix}\\n" for suffix in ("EXPORT", "NO_EXPORT", "DEPRECATED", "DEPRECATED_EXPORT", "DEPRECATED_NO_EXPORT"))
+    return inspect.cleandoc(f"""
+    # export macros of the sources, defined empty without --hidden_visibility
+    foreach(NAME {" ".join(names)})
+      string(TOUPPER {export_prefix(postfix)}_${{NAME}} EXPORT_BASE)
+      file(CONFIGURE OUTPUT ${{ROOT_BINARY_DIR}}/include/{postfix}/${{NAME}}_export.h
+        CONTENT "#pragma once\\n\\n{macros}" @ONLY)
+    endforeach()
+    """) + "\n\n"
+
 def caller_content(prefix, dirs):
     # non-library directories call the add_subdirectory command on each subfolder
     prefix_macro = "_".join(prefix.upper().split(os.path.sep))
@@ -191,7 +342,7 @@ def add_lib_content(postfix):
         $<INSTALL_INTERFACE:include>"""
 
     glob_include = f"include_directories(${{ROOT_BINARY_DIR}}/include)"
-    return f"\n# Global include directory\n{glob_include}\n\n" + inspect.cleandoc(f"""
+    content = f"\n# Global include directory\n{glob_include}\n\n" + inspect.cleandoc(f"""
     # create shared libraries
     # interface library to provide path to the include dir
     add_library(${{NS}}INTERFACE INTERFACE)
@@ -201,8 +352,17 @@ def add_lib_content(postfix):
 
     target_include_directories(${{NS}}INTERFACE{exported}
     )
+    """) + "\n\n"
+
+    if lib_granularity != "file":
+        return content + add_directory_lib_content(postfix, local)
 
-    file(GLOB SOURCES "src/*.cpp")
+    # export macros of each source with --hidden_visibility
+    export_header = f"""
+
+      {export_header_content("${NS}${NAME}", postfix, 6)}""" if use_hidden_visibility else ""
+    include_export = "\ninclude(GenerateExportHeader)\n\n" if use_hidden_visibility else ""
+    return content + files_content("SOURCES", library_files(postfix, "src", ".cpp")) + "\n" + include_export + inspect.cleandoc(f"""
     foreach(SOURCE ${{SOURCES}})
       cmake_path(GET SOURCE STEM NAME)
       add_library(${{NS}}${{NAME}} SHARED include/{postfix}/${{NAME}}.h src/${{NAME}}.cpp)
@@ -211,10 +371,51 @@ def add_lib_content(postfix):
       set(TARGETS "${{TARGETS}};${{NS}}${{NAME}}" CACHE INTERNAL "")
 
       target_include_directories(${{NS}}${{NAME}} {add_indents(local)}
-      )
+      ){export_header}
     endforeach()
     """) + "\n\n"
 
+def add_directory_lib_content(postfix, local):
+    # a single library of the sources of the directory, shared or an object library linked into the ${MAIN_PROJECT} library
+    install_namespace = path_to_ns(postfix)
+    project_name = postfix.split(os.path.sep)[-1]
+    library_type = "OBJECT" if lib_granularity == "object" else "SHARED"
+    object_targets = f"""
+      set(OBJECT_TARGETS "${{OBJECT_TARGETS}};${{NS}}{project_name}" CACHE INTERNAL "")""" if lib_granularity == "object" else ""
+    # the export condition of the macros is only defined by CMake when the sources of a shared library are compiled
+    export_define = f"""
+      string(MAKE_C_IDENTIFIER ${{NS}}{project_name}_EXPORTS EXPORT_DEFINE)
+      target_compile_definitions(${{NS}}{project_name} PRIVATE ${{EXPORT_DEFINE}})""" if lib_granularity == "object" and use_hidden_visibility else ""
+    export_headers = f"""
+
+      # export macros of each source
+      include(GenerateExportHeader)
+      foreach(SOURCE ${{SOURCES}})
+        cmake_path(GET SOURCE STEM NAME)
+        {export_header_content(f"${{NS}}{project_name}", postfix, 8)}
+      endforeach()""" if use_hidden_visibility else ""
+    sources = files_content("SOURCES", library_files(postfix, "src", ".cpp"))
+    headers = files_content("HEADERS", library_files(postfix, "include", ".h"))
+    return sources + "\n" + headers + "\n" + inspect.cleandoc(f"""
+    if(SOURCES)
+      add_library(${{NS}}{project_name} {library_type} ${{HEADERS}} ${{SOURCES}})
+      add_library({install_namespace}{project_name} ALIAS ${{NS}}{project_name})
+      # add to the exported targets
+      set(TARGETS "${{TARGETS}};${{NS}}{project_name}" CACHE INTERNAL ""){object_targets}
+
+      target_include_directories(${{NS}}{project_name} {add_indents(local)}
+      ){export_define}{export_headers}
+    endif()
+    """) + "\n\n"
+
+def swig_link_target(postfix):
+    # library linked to the swig module of the interface swig/<NAME>.i
+    if lib_granularity == "object":
+        return "${MAIN_PROJECT}"
+    if lib_granularity == "directory":
+        return path_to_ns(postfix) + postfix.split(os.path.sep)[-1]
+    return path_to_ns(postfix) + "${NAME}"
+
 def add_swig_content(postfix):
     # CMake script to create swig targets. They will be installed from the top CMakeLists.txt file
     install_namespace = path_to_ns(postfix)
@@ -222,6 +423,24 @@ def add_swig_content(postfix):
     for folder in postfix.split(os.path.sep):
         python_prefixes.append(python_prefixes[-1] + folder + os.path.sep)
     python_prefixes = ";".join(python_prefixes)
+    # ${MAIN_PROJECT}.libs of the wheel relative to the swig module in ${MAIN_PROJECT}/<postfix>
+    wheel_libs = "../" * (len(postfix.split(os.path.sep)) + 1) + "${MAIN_PROJECT}.libs"
+    # the numpy typemaps are applied by an interface wrapping swig/<NAME>.i (see write_numpy_interfaces)
+    source = f"${{ROOT_BINARY_DIR}}/.cmakegen/swig/{postfix}/${{NAME}}.i" if use_swig_numpy else "swig/${NAME}.i"
+    numpy_source = ""
+    numpy_include = ""
+    if use_swig_numpy:
+        numpy_source = f"""
+      # numpy.i and swig/${{NAME}}.i are included by the generated interface
+      set_property(SOURCE {source} APPEND PROPERTY INCLUDE_DIRECTORIES ${{CMAKE_CURRENT_SOURCE_DIR}} ${{NUMPY_SWIG_DIR}})
+      set_property(SOURCE {source} APPEND PROPERTY DEPENDS ${{CMAKE_CURRENT_SOURCE_DIR}}/swig/${{NAME}}.i)"""
+        numpy_include = "\n      target_include_directories(${NAME}SWIG PRIVATE ${Python_NumPy_INCLUDE_DIRS})"
+    # swig does not read the export headers, their macros are defined empty
+    export_macros = [f"{export_prefix(postfix)}_{name.upper()}_{suffix}="
+        for name in export_names(postfix) for suffix in ("EXPORT", "NO_EXPORT", "DEPRECATED", "DEPRECATED_EXPORT", "DEPRECATED_NO_EXPORT")]
+    export_definitions = f"""
+      set_property(SOURCE {source} APPEND PROPERTY COMPILE_DEFINITIONS
+        {(chr(10) + "        ").join(export_macros)})""" if export_macros else ""
     content = inspect.cleandoc(f"""
     # setting up python modules
 
@@ -235,36 +454,46 @@ def add_swig_content(postfix):
     # the generated cxx file myVectorPYTHON_wrap.cxx uses the python library #include <Python.h> )
     include_directories(${{PYTHON_INCLUDE_PATH}})
 
-    file(GLOB SWIG_INTERFACES "swig/*.i")
-
+    """) + "\n\n" + files_content("SWIG_INTERFACES", library_files(postfix, "swig", ".i")) + "\n\n"
+    flags = ""
+    if swig_flags:
+        patterns = swig_options.read_nothread_patterns(os.path.join(cmake_root, "scripts"))
+        flags = swig_options.flags_content(postfix, library_files(postfix, "swig", ".i"), swig_flags, patterns, source)
+    if flags:
+        content += "# swig flags of the interfaces\n" + flags + "\n\n"
+    content += inspect.cleandoc(f"""
     if(SWIG_INTERFACES)
       make_directory(${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}/{postfix})
       set(PYTHON_PREFIXES {python_prefixes})
+      # packages exposing their wrapped modules lazily (written by generate_cmake.py)
       foreach(PYTHON_PREFIX ${{PYTHON_PREFIXES}})
-        file(TOUCH ${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}${{PYTHON_PREFIX}}__init__.py)
+        configure_file(${{ROOT_BINARY_DIR}}/.cmakegen/python${{PYTHON_PREFIX}}__init__.py
+          ${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}${{PYTHON_PREFIX}}__init__.py COPYONLY)
       endforeach()
     endif()
 
     # creating/linking swig targets
     foreach(SWIG_INTERFACE ${{SWIG_INTERFACES}})
       cmake_path(GET SWIG_INTERFACE STEM NAME)
-      set_source_files_properties(swig/${{NAME}}.i PROPERTIES CPLUSPLUS ON)
-      set_source_files_properties(swig/${{NAME}}.i PROPERTIES INCLUDE_DIRECTORIES ${{CMAKE_CURRENT_SOURCE_DIR}}/include/{postfix})
+      set_source_files_properties({source} PROPERTIES CPLUSPLUS ON)
+      set_source_files_properties({source} PROPERTIES INCLUDE_DIRECTORIES ${{CMAKE_CURRENT_SOURCE_DIR}}/include/{postfix}){numpy_source}{export_definitions}
 
       swig_add_library(${{NAME}}SWIG 
         LANGUAGE python
         OUTPUT_DIR ${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}/{postfix}
         OUTFILE_DIR ${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}/{postfix}
-        SOURCES swig/${{NAME}}.i)
+        SOURCES {source})
 
-      target_include_directories(${{NAME}}SWIG PRIVATE ${{CMAKE_CURRENT_SOURCE_DIR}}/include/{postfix})
+      target_include_directories(${{NAME}}SWIG PRIVATE ${{CMAKE_CURRENT_SOURCE_DIR}}/include/{postfix}){numpy_include}
 
       add_library({install_namespace}${{NAME}}SWIG ALIAS ${{NAME}}SWIG)
 
-      swig_link_libraries(${{NAME}}SWIG {install_namespace}${{NAME}} ${{PYTHON_LIBRARIES}})
+      swig_link_libraries(${{NAME}}SWIG {swig_link_target(postfix)} ${{PYTHON_LIBRARIES}})
 
       # LIBRARY_OUTPUT_DIRECTORY will be the location for _<libname>SWIG.so
       SET_TARGET_PROPERTIES(${{NAME}}SWIG PROPERTIES LIBRARY_OUTPUT_DIRECTORY ${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}/{postfix})
+      # the project libraries bundled into the wheel
+      set_property(TARGET ${{NAME}}SWIG APPEND PROPERTY BUILD_RPATH "$ORIGIN/{wheel_libs}")
 
       # Files to install with Python
       set(PYTHON_INSTALL_FILES "${{PYTHON_INSTALL_FILES}};${{ROOT_BINARY_DIR}}/python/${{MAIN_PROJECT}}/{postfix}/${{NAME}}.py" CACHE INTERNAL "")
@@ -287,9 +516,7 @@ def add_exe_content(postfix):
         $<BUILD_INTERFACE:${{CMAKE_CURRENT_SOURCE_DIR}}/include/{postfix}>
         $<INSTALL_INTERFACE:include/{postfix}>"""
     
-    return inspect.cleandoc(f"""
-    # create executables
-    file(GLOB EXES "apps/*.cpp")
+    return "# create executables\n" + files_content("EXES", library_files(postfix, "apps", ".cpp")) + "\n" + inspect.cleandoc(f"""
     foreach(EXE ${{EXES}})
       cmake_path(GET EXE STEM NAME)
       add_executable(${{NS}}${{NAME}} apps/${{NAME}}.cpp)
@@ -301,6 +528,176 @@ def is_local(include):
     # include is local when it is inside the same lib directory as the file it is included into
     return include.count('/') == 0
 
+def read_extra_links():
+    path = os.path.join(cmake_root, "scripts", "extra_libs.txt")
+    res = {}
+    with open(path, 'r') as f:
+        lines = f.readlines()
+        for line in lines:
+            if not line.startswith("#"):
+                items = line.split()
+                if not items:
+                    continue
+                if len(items) <= 1:
+                    raise ValueError(line + f" in {path} has wrong format.")
+                # remove .h extension
+                res[items[0][:-2]] = items[1:]
+    return res
+
+def is_export_header(rpath, include):
+    # <name>_export.h of a library source, generated in the build include directory (see export_names)
+    name = include_to_name(include)
+    if not name.endswith("_export"):
+        return False
+    prefix = rpath if is_local(include) else include_to_rpath(include)
+    return not os.path.exists(header_path(prefix, name)) and os.path.exists(os.path.join(cmake_root, prefix, "src", name[:-len("_export")] + ".cpp"))
+
+def extract_includes(rpath, name, is_header = True):
+
+    includes = include_cache.find_includes(get_path(rpath, name, is_header))
+    timer.count("include_lookups")
+    timer.count("regex_evaluations", 2 * len(includes))
+
+    # include "path_to_header/header_name.h" -> path_to_header/header_name
+    regex = '.*".*".*'
+    user_includes = set()
+    qt_includes = set()
+    for incl in includes:
+        if not re.search(regex, incl) is None:
+            name = incl.split('"')[1][:-2]
+            if use_qt and incl.split('"')[1].startswith("ui_"):
+                if not is_local(incl):
+                    header_location = os.path.join(cmake_root, rpath, "include", rpath, name)
+                    raise ValueError(f"Error. One of your UI files included to {header_location} from an other include directory.")
+                qt_includes.add(name)
+            elif not "build_info.h" in incl and not is_export_header(rpath, name):
+                user_includes.add(name)
+
+    regex = '.*<.*>.*'
+    extra_includes = {incl.split('<')[-1].split('>')[0][:-2] for incl in includes
+    if not re.search(regex, incl) is None and incl.split('<')[-1].split('>')[0][:-2] in extra_links}
+
+    return (user_includes, extra_includes, qt_includes)
+
+def try_get_source_ns(include, rpath):
+    is_local_link = is_local(include)
+    folders = rpath.split('/') if is_local_link else include.split('/')[:-1]
+    name = include.split('/')[-1]
+    if os.path.exists(os.path.join(cmake_root, *folders, "src", f"{name}.cpp")):
+        # the library of the directory contains the source with the other granularities
+        return ".".join(folders) + f".{name if lib_granularity == 'file' else folders[-1]}"
+    else: # return None if included file does not have a source
+        return None
+
+def file_dependencies(rpath, name, is_header):
+    """
+    collects the dependencies declared by the includes of a single header/source file
+
+    returns (contributions, headers, target_header):
+    contributions: libraries to link (deps, extra_deps, qt_deps), include directories (included_dirs, required_include_dirs)
+    and the parsed file itself (files)
+    headers: header-only includes, their dependencies are inherited recursively
+    target_header: header of the source file (target) itself, its dependencies are inherited publicly
+    """
+    includes, extra_includes, qt_includes = extract_includes(rpath, name, is_header)
+    contributions = {"deps": set(), "included_dirs": set(), "required_include_dirs": set(), "extra_deps": set(), "qt_deps": set(qt_includes),
+        "files": {get_path(rpath, name, is_header)}}
+    for include in extra_includes:
+        contributions["extra_deps"].update(extra_links[include])
+    headers = []
+    target_header = None
+    for include in includes:
+        is_target_header_include = include == name and not is_header
+        source = None if include == name else try_get_source_ns(include, rpath)
+        prefix = rpath if is_local(include) else include_to_rpath(include)
+        global_include = prefix.replace(os.path.sep, "/")
+        # header only dependency, search recursively for its library dependencies
+        if source is None:
+            if is_target_header_include:
+                target_header = (prefix, include_to_name(include))
+            else:
+                contributions["required_include_dirs"].add(global_include)
+                headers.append((prefix, include_to_name(include)))
+        # library dependency, link to target
+        else:
+            contributions["included_dirs"].add(global_include)
+            contributions["deps"].add(source)
+            if lib_granularity == "object":
+                # every object ends up in the same library so the header is inherited like a header-only include
+                headers.append((prefix, include_to_name(include)))
+    return contributions, headers, target_header
+
+def header_dependencies(key):
+    # node of the project include graph, key is (rpath, name) of a header file
+    contributions, headers, _ = file_dependencies(*key, True)
+    return contributions, headers
+
+def included_headers(rpath, includes):
+    # keys of the existing project headers among the includes of a file of the library directory
+    keys = [(rpath if is_local(include) else include_to_rpath(include), include_to_name(include)) for include in includes]
+    return sorted(key for key in keys if os.path.isfile(header_path(*key)))
+
+def header_includes(key):
+    # node of the complete include graph, headers with a source file are followed as well
+    return {"files": {header_path(*key)}, "keys": {key}}, included_headers(key[0], extract_includes(*key, True)[0])
+
+def translation_unit_files(rpath, name):
+    # the source file and every project header it reaches
+    files = {source_path(rpath, name)}
+    for key in included_headers(rpath, extract_includes(rpath, name, False)[0]):
+        files |= include_graph.closure(key)["files"]
+    return files
+
+def link_targets(rpath):
+    """
+    (target, source names, is library) of the targets defined in a library directory
+
+    libraries are built from a single source with the file granularity, otherwise the sources of the directory
+    are built into one library named after the directory. Executables are built from a single source under apps
+    """
+    library = project["libraries"][rpath]
+    sources = sorted(remove_extension(name) for name in library["src"])
+    apps = [(name, [name], False) for name in sorted(remove_extension(name) for name in library["apps"])]
+    if lib_granularity == "file":
+        return sorted([(name, [name], True) for name in sources] + apps)
+    return ([(rpath.split(os.path.sep)[-1], sources, True)] if sources else []) + apps
+
+dependency_kinds = ("included_dirs", "required_include_dirs", "deps", "extra_deps", "qt_deps")
+
+def target_dependencies(project_rpath, target, names, is_library):
+    """
+    public/private links and include directories of a target built from the given sources of a library directory
+
+    the dependencies of the included headers are looked up from the project include graph.
+    returns a dictionary of {"PUBLIC": set, "PRIVATE": set} for each of dependency_kinds
+    """
+    dependencies = {kind: {"PUBLIC": set(), "PRIVATE": set()} for kind in dependency_kinds}
+    dependencies["included_dirs"] = {"PUBLIC": set([project_rpath]), "PRIVATE": set([project_rpath])}
+    for name in names:
+        contributions, headers, target_header = file_dependencies(project_rpath, name, False)
+        collected = {
+            "PRIVATE": [contributions] + [dependency_graph.closure(header) for header in headers],
+            "PUBLIC": [dependency_graph.closure(target_header)] if target_header else []
+        }
+        for access, closures in collected.items():
+            for closure in closures:
+                for kind in dependency_kinds:
+                    dependencies[kind][access] |= closure.get(kind, set())
+    deps = dependencies["deps"]
+    if is_library and lib_granularity == "directory":
+        # sources of the same directory are in the same library
+        self_link = path_to_ns(project_rpath) + target
+        deps["PUBLIC"].discard(self_link)
+        deps["PRIVATE"].discard(self_link)
+    if is_library and lib_granularity == "object":
+        # object libraries are not linked to each other (it would create cycles between directories),
+        # the include directories of the libraries are added instead
+        for access in ("PUBLIC", "PRIVATE"):
+            dependencies["required_include_dirs"][access] |= dependencies["included_dirs"][access]
+            dependencies["included_dirs"][access] = set([project_rpath])
+            deps[access] = set()
+    return dependencies
+
 def link_contents(project_rpath):
 
     def rpath_sets_to_interface_alias_sets(missing_include_dirs):
@@ -322,45 +719,6 @@ def link_contents(project_rpath):
         macro = "_".join(name.upper().split(".")[:-1])
         return f"USE_{macro}"
 
-    def read_extra_links():
-        path = os.path.join(cmake_root, "scripts", "extra_libs.txt")
-        res = {}
-        with open(path, 'r') as f:
-            lines = f.readlines()
-            for line in lines:
-                if not line.startswith("#"):
-                    items = line.split(" ")
-                    if len(items) <= 1:
-                        raise ValueError(line + f" in {path} has wrong format.")
-                    # remove .h extension
-                    res[items[0][:-2]] = items[1:]
-        return res
-
-    def extract_includes(rpath, name, is_header = True):
-        
-        includes = parse_includes.find_includes(get_path(rpath, name, is_header))
-
-        # include "path_to_header/header_name.h" -> path_to_header/header_name
-        regex = '.*".*".*'
-        user_includes = set()
-        qt_includes = set()
-        for incl in includes:
-            if not re.search(regex, incl) is None:
-                name = incl.split('"')[1][:-2]
-                if use_qt and incl.split('"')[1].startswith("ui_"):
-                    if not is_local(incl):
-                        header_location = os.path.join(cmake_root, rpath, "include", rpath, name)
-                        raise ValueError(f"Error. One of your UI files included to {header_location} from an other include directory.")
-                    qt_includes.add(name)
-                elif not "build_info.h" in incl:
-                    user_includes.add(name)
-
-        regex = '.*<.*>.*'
-        extra_includes = {incl.split('<')[-1].split('>')[0][:-2] for incl in includes 
-        if not re.search(regex, incl) is None and incl.split('<')[-1].split('>')[0][:-2] in extra_links}
-
-        return (user_includes, extra_includes, qt_includes)
-
     def target_link_extra_libraries_content():
         content = ""
         # these are libraries that are not defined in the project and not linked by CMake automatically like the cmath library
@@ -373,16 +731,19 @@ def link_contents(project_rpath):
         if extra_deps:
             command = f"target_link_libraries(${{NS}}{target}\n"
             for k, v in extra_deps.items():
-                content += add_indents(deps_content(list(v), k))
+                content += add_indents(deps_content(sorted(v), k))
             if content:
                 content = command + content + ")\n\n"
         return content
 
     def target_link_libraries_content():
+        if not is_library and lib_granularity == "object" and deps["PUBLIC"] | deps["PRIVATE"]:
+            # the objects of the project are linked into a single library
+            return f"target_link_libraries(${{NS}}{target} PRIVATE ${{MAIN_PROJECT}})\n\n"
         if deps:
             content = ""
             for k, v in deps.items():
-                for name in v:
+                for name in sorted(v):
                     content += f"if({to_macro(name)})\n"
                     content += f"  target_link_libraries(${{NS}}{target}\n{add_indents(deps_content([name], k))}"
                     content += "  )\n"
@@ -396,19 +757,10 @@ def link_contents(project_rpath):
             content = ""
             for k, v in project_interfaces.items():
                 if v:
-                    content += deps_content(list(v), k)
+                    content += deps_content(sorted(v), k)
             return f"target_include_directories(${{NS}}{target}\n" + content + ")\n\n" if content else ""
         return ""
 
-    def try_get_source_ns(include, rpath):
-        is_local_link = is_local(include)
-        folders = rpath.split('/') if is_local_link else include.split('/')[:-1]
-        name = include.split('/')[-1]
-        if os.path.exists(os.path.join(cmake_root, *folders, "src", f"{name}.cpp")):
-            return ".".join(folders) + f".{name}"
-        else: # return None if included file does not have a source
-            return None
-
     def merge_deps():
         # merging public/private links and include statements
 
@@ -423,67 +775,13 @@ def link_contents(project_rpath):
 
         project_interfaces.update(rpath_sets_to_interface_alias_sets(missing_include_dirs))
 
-    def check_circular_dependency(collector):
-        # decorator to prevent infinite recursion while finding linking relationships
-        def check(rpath, name, is_header, access):
-            dep = os.path.join(rpath, name)
-            # we could detect general dependency cycles but they would be detected by cmake anyway
-            # header-only dependency cycle would cause infinite recursion that is why we should detect it
-            # it is better to not have it at the first place but forward declaration can make it work
-            if dep in dependencies:
-                # stop search
-                return
-            else:
-                if is_header:
-                    dependencies.add(dep)
-                # getting the collected dependencies
-                res = collector(rpath, name, is_header, access)
-                if is_header:
-                    dependencies.remove(dep)
-                # returning the collected dependencies
-                return res
-    
-        return check
-    
-    @check_circular_dependency
-    def collect_dependecies(rpath, name, is_header, access):
-        # find sources for each target to link (private/interface/public) in CMake script
-        includes, extra_includes, qt_includes = extract_includes(rpath, name, is_header)
-        qt_deps[access] |= qt_includes
-        for include in extra_includes:
-            extra_deps[access].update(extra_links[include])
-        for include in includes:
-            is_target_header_include = include == name and not is_header
-            source = None if include == name else try_get_source_ns(include, rpath)
-            prefix = rpath if is_local(include) else include_to_rpath(include)
-            global_include = prefix.replace(os.path.sep, "/")
-            # header only dependency, search recursively for its library dependencies
-            if source is None:
-                if is_target_header_include:
-                    collect_dependecies(prefix, include_to_name(include), True, "PUBLIC")
-                else:
-                    required_include_dirs[access].add(global_include)
-                    collect_dependecies(prefix, include_to_name(include), True, access)
-            # library dependency, link to target
-            else:
-                included_dirs[access].add(global_include)
-                deps[access].add(source)
-    
-    extra_links = read_extra_links()
-    sys.setrecursionlimit(500)
     content = ""
-    targets = get_file_names(project_rpath)
     project_interfaces = {"PUBLIC": set(), "PRIVATE": set()}
-    for target in targets:
-        # reset variables
-        dependencies = set()
-        included_dirs = {"PUBLIC": set([project_rpath]), "PRIVATE": set([project_rpath])}
-        required_include_dirs = {"PUBLIC": set(), "PRIVATE": set()}
-        deps = {"PUBLIC": set(), "PRIVATE": set()}
-        extra_deps = {"PUBLIC": set(), "PRIVATE": set()}
-        qt_deps = {"PUBLIC": set(), "PRIVATE": set()}
+    for target, names, is_library in link_targets(project_rpath):
         try:
-            collect_dependecies(project_rpath, target, False, "PRIVATE")
+            with timer.phase("resolve"):
+                dependencies = target_dependencies(project_rpath, target, names, is_library)
+            included_dirs, required_include_dirs, deps, extra_deps, qt_deps = (dependencies[kind] for kind in dependency_kinds)
             merge_deps()
             content += target_link_libraries_content()
             content += target_link_extra_libraries_content()
@@ -499,25 +797,92 @@ def link_contents(project_rpath):
     if content != "": content = "# link libraries\n" + content
     return content
 
+def library_links(rpath):
+    # library directories linked to the library of a directory (directory granularity)
+    links = set()
+    for target, names, is_library in link_targets(rpath):
+        if not is_library:
+            continue
+        for name in names:
+            contributions, headers, target_header = file_dependencies(rpath, name, False)
+            links |= contributions["deps"]
+            for header in headers + ([target_header] if target_header else []):
+                links |= dependency_graph.closure(header)["deps"]
+    links = {os.path.sep.join(link.split(".")[:-1]) for link in links}
+    links.discard(rpath)
+    return sorted(links)
+
+def check_directory_cycles(lib_dirs):
+    # shared libraries can not depend on each other, cycles between the directories are reported before writing anything
+    links_graph = DependencyGraph(lambda rpath: ({"dirs": {rpath}}, library_links(rpath)))
+    for rpath in lib_dirs:
+        cycle = sorted(other for other in links_graph.closure(rpath)["dirs"] if rpath in links_graph.closure(other)["dirs"])
+        if len(cycle) > 1:
+            print(f"Error. The libraries of the directories {', '.join(cycle)} depend on each other. "
+                "Shared libraries can not have cyclic dependencies, use --lib_granularity file or object or move the sources.")
+            sys.exit(1)
+
+def source_files(rpath, name):
+    # the source file and the header files it reaches (read from the include graph)
+    contributions, headers, target_header = file_dependencies(rpath, name, False)
+    files = set(contributions["files"])
+    for header in headers + ([target_header] if target_header else []):
+        files |= dependency_graph.closure(header)["files"]
+    return files
+
+def library_inputs(project_rpath):
+    # files whose includes determine the content of the library CMakeLists.txt
+    files = set()
+    for target in get_file_names(project_rpath):
+        files |= source_files(project_rpath, target)
+        if use_pch:
+            # the precompiled headers are ranked over every header reached, headers with a source file included
+            files |= translation_unit_files(project_rpath, target)
+    # paths are stored relative to the project root
+    return {path[len(cmake_root) + 1:]: include_cache.content_hash(path) for path in files}
+
+def generation_options_key():
+    # fingerprint of everything the generated files depend on apart from the included files
+    options = {k: v for k, v in args.items() if k not in ("clean", "no_cache", "cache_stats", "incremental", "build_only", "watch", "watch_interval", "watch_polling",
+        "jobs", "timings", "profile", "trace", "header_report", "target_graph")}
+    layout = project_scanner.index_content(project)
+    scripts = []
+    scripts_dir = os.path.join(cmake_root, "scripts")
+    for name in sorted(os.listdir(scripts_dir)):
+        if name.endswith(".py") or name in ("extra_libs.txt", "unity_exclude.txt", "swig_nothread.txt"):
+            with open(os.path.join(scripts_dir, name), 'rb') as f:
+                scripts.append((name, content_hash(f.read())))
+    return content_hash(repr((options, layout, scripts)))
+
 def clean():
     # delete generated files/directories
-    files = []
+    files = [os.path.join(cmake_root, path) for path in project["generated"]]
     top_cmake_file = os.path.join(cmake_root, "CMakeLists.txt")
     if os.path.exists(top_cmake_file):
         os.remove(top_cmake_file)
-    for dir in subdirs:
-        files.extend([path for path in glob.glob(os.path.join(cmake_root, dir, "**", "CMakeLists.txt"), recursive=True)])
-    files.extend([path for path in glob.glob(os.path.join(cmake_root, "**", "*.h.in"), recursive=True)])
     if os.path.exists(os.path.join(cmake_root, "build")):
         shutil.rmtree(os.path.join(cmake_root, "build"))
     if os.path.exists(os.path.join(cmake_root, "_install")):
         shutil.rmtree(os.path.join(cmake_root, "_install"))
+    if os.path.exists(os.path.join(cmake_root, ".pgo")):
+        shutil.rmtree(os.path.join(cmake_root, ".pgo"))
     files.append(os.path.join(cmake_root, "cmake", "Config.cmake.in"))
+    files += [os.path.join(cmake_root, script) for script in ("configure-fast.sh", "build-fast.sh", "pgo.sh", "run-bench.sh")]
+    build_only.remove_presets(os.path.join(cmake_root, build_only.presets_file))
     for file in files:
         # do not touch external libraries
         if not os.path.sep + "external" + os.path.sep in file and os.path.exists(file):
             os.remove(file)
 
+extra_links = read_extra_links()
+if use_benchmark:
+    extra_links.update(benchmark.extra_links)
+
+# the include graph is shared by every library directory so each header is processed once
+dependency_graph = DependencyGraph(header_dependencies)
+# every project include, for the header analyses (--pch, --header_report)
+include_graph = DependencyGraph(header_includes)
+
 def create_top_cmakelists():
     subdir_content = caller_content("", subdirs)
     main_project = os.path.basename(cmake_root)
@@ -534,10 +899,35 @@ def create_top_cmakelists():
     set(CMAKE_CXX_EXTENSIONS OFF)
     """)
 
+    if use_hidden_visibility:
+        content += "\n\n"
+        content += inspect.cleandoc("""
+        # only the symbols marked with the macros of the generated <source>_export.h headers are exported
+        set(CMAKE_CXX_VISIBILITY_PRESET hidden)
+        set(CMAKE_VISIBILITY_INLINES_HIDDEN ON)
+        """)
+
+    if use_accelerate:
+        content += "\n\n"
+        content += accelerate.cmake_content(use_pch)
+
+    if use_ipo or use_pgo:
+        content += "\n\n"
+        content += optimize.cmake_content(use_ipo, use_pgo)
+
+    if lib_granularity == "object":
+        content += "\n\n"
+        content += "# object libraries are linked into a shared library\n"
+        content += "set(CMAKE_POSITION_INDEPENDENT_CODE ON)"
+
     if use_googletest:
         content += "\n\n"
         content += "find_package(GTest REQUIRED)"
 
+    if use_benchmark:
+        content += "\n\n"
+        content += "find_package(benchmark REQUIRED)"
+
     if use_qt:
         content += "\n\n"
         content += qt.find_package_content()
@@ -600,12 +990,39 @@ def create_top_cmakelists():
 
     content += "\n"
 
+    if lib_granularity == "object":
+        content += add_indents('set(OBJECT_TARGETS "" CACHE INTERNAL "")') + "\n\n"
+
     if use_swig_python:
         content += add_indents(inspect.cleandoc("""
       # files/locations to install for python interface/modules
       set(PYTHON_INSTALL_FILES "" CACHE INTERNAL "")
       set(PYTHON_INSTALL_RPATHS "" CACHE INTERNAL "")
       set(SWIG_TARGETS "" CACHE INTERNAL "")
+
+      # the shared libraries of the project are bundled into ${MAIN_PROJECT}.libs of the wheel (see install.py wheel),
+      # they find each other there. The swig modules search it as well (see add_swig_content)
+      set(CMAKE_BUILD_RPATH "$ORIGIN")
+      """))
+
+        content += "\n\n"
+
+    if use_swig_numpy:
+        content += add_indents(inspect.cleandoc("""
+      # numpy headers and numpy.i (not installed with numpy) for the numpy typemaps of the swig modules
+      find_package(Python COMPONENTS Interpreter Development NumPy REQUIRED)
+      find_path(NUMPY_SWIG_DIR numpy.i PATHS ${CMAKE_CURRENT_SOURCE_DIR}/cmake ${CMAKE_CURRENT_BINARY_DIR}/numpy NO_DEFAULT_PATH)
+      if(NOT NUMPY_SWIG_DIR)
+        # numpy.i of the found numpy version
+        set(NUMPY_SWIG_URL https://raw.githubusercontent.com/numpy/numpy/v${Python_NumPy_VERSION}/tools/swig/numpy.i)
+        file(DOWNLOAD ${NUMPY_SWIG_URL} ${CMAKE_CURRENT_BINARY_DIR}/numpy/numpy.i STATUS NUMPY_SWIG_STATUS)
+        list(GET NUMPY_SWIG_STATUS 0 NUMPY_SWIG_ERROR)
+        if(NUMPY_SWIG_ERROR)
+          file(REMOVE ${CMAKE_CURRENT_BINARY_DIR}/numpy/numpy.i)
+          message(FATAL_ERROR "numpy.i could not be downloaded from ${NUMPY_SWIG_URL}, copy tools/swig/numpy.i of the numpy sources to cmake/numpy.i")
+        endif()
+        set(NUMPY_SWIG_DIR ${CMAKE_CURRENT_BINARY_DIR}/numpy CACHE PATH "Directory of numpy.i" FORCE)
+      endif()
       """))
 
         content += "\n\n"
@@ -614,6 +1031,19 @@ def create_top_cmakelists():
 
     content += "\n\n"
 
+    if lib_granularity == "object":
+        content += add_indents(inspect.cleandoc("""
+      # single shared library built from the object libraries of the project directories
+      add_library(${MAIN_PROJECT} SHARED)
+      string(SUBSTRING "${OBJECT_TARGETS}" 1 -1 OBJECT_TARGETS)
+      foreach(OBJECT_TARGET ${OBJECT_TARGETS})
+        target_link_libraries(${MAIN_PROJECT} PUBLIC ${OBJECT_TARGET})
+      endforeach()
+      set(TARGETS "${TARGETS};${MAIN_PROJECT}" CACHE INTERNAL "")
+      """))
+
+        content += "\n\n"
+
     content += add_indents(inspect.cleandoc(f"""
       # includes for install/exporting
       include(GenerateExportHeader)
@@ -684,14 +1114,25 @@ def create_top_cmakelists():
       install(FILES ${{CMAKE_CURRENT_BINARY_DIR}}/include/build_info.h DESTINATION "${{CMAKE_INSTALL_INCLUDEDIR}}")
     """))
 
+    if use_hidden_visibility or any(export_names(rpath) for rpath in get_lib_dirs()):
+        content += "\n\n"
+        content += add_indents(inspect.cleandoc(f"""
+      # export macros of the library sources: <install_prefix>/include/<rel_path>/<source>_export.h
+      install(
+        DIRECTORY ${{CMAKE_CURRENT_BINARY_DIR}}/include/
+        DESTINATION "${{CMAKE_INSTALL_INCLUDEDIR}}"
+        FILES_MATCHING PATTERN "*_export.h"
+      )
+    """))
+
     if use_swig_python:
         content += "\n"
         content += add_indents(inspect.cleandoc(f"""
-      # remove leading ;
-      string(SUBSTRING "${{PYTHON_INSTALL_FILES}}" 1 -1 PYTHON_INSTALL_FILES)
-      string(SUBSTRING "${{PYTHON_INSTALL_RPATHS}}" 1 -1 PYTHON_INSTALL_RPATHS)
+      # remove leading ; (the lists are empty if none of the built library directories has swig interfaces)
+      string(REGEX REPLACE "^;" "" PYTHON_INSTALL_FILES "${{PYTHON_INSTALL_FILES}}")
+      string(REGEX REPLACE "^;" "" PYTHON_INSTALL_RPATHS "${{PYTHON_INSTALL_RPATHS}}")
 
-      string(SUBSTRING "${{SWIG_TARGETS}}" 1 -1 SWIG_TARGETS)
+      string(REGEX REPLACE "^;" "" SWIG_TARGETS "${{SWIG_TARGETS}}")
 
       # Configure setup.py and copy to output directory
       # we input PYTHON_INSTALL_FILES and PYTHON_INSTALL_RPATHS to install.py
@@ -699,62 +1140,663 @@ def create_top_cmakelists():
       set(INSTALL_PY_OUT ${{CMAKE_CURRENT_BINARY_DIR}}/scripts/install.py)
       configure_file(${{INSTALL_PY_IN}} ${{INSTALL_PY_OUT}})
 
+      # shared libraries of the project bundled into the wheel, the swig modules link them
+      set(PYTHON_LIBRARIES "")
+      foreach(TARGET_NAME ${{TARGETS}})
+        get_target_property(TARGET_TYPE ${{TARGET_NAME}} TYPE)
+        if(TARGET_TYPE STREQUAL "SHARED_LIBRARY")
+          list(APPEND PYTHON_LIBRARIES "$<TARGET_FILE:${{TARGET_NAME}}>")
+        endif()
+      endforeach()
+      string(JOIN "\\n" PYTHON_LIBRARIES_CONTENT ${{PYTHON_LIBRARIES}})
+      file(GENERATE OUTPUT ${{CMAKE_CURRENT_BINARY_DIR}}/scripts/python_libraries.txt CONTENT "${{PYTHON_LIBRARIES_CONTENT}}\\n")
+
       # add custom target that is available after every swig target is built
       # you can use it by running cmake --build build --target install-python
+      # only the changed files are installed, PYTHON_INSTALL_LINK=hardlink or reflink links them instead of copying (development)
+      set(PYTHON_INSTALL_LINK "copy" CACHE STRING "How the python modules are installed (copy, hardlink or reflink)")
+      set_property(CACHE PYTHON_INSTALL_LINK PROPERTY STRINGS copy hardlink reflink)
       add_custom_target(install-python
       DEPENDS ${{SWIG_TARGETS}}
-      COMMAND python3 ${{INSTALL_PY_OUT}} install)
+      COMMAND python3 ${{INSTALL_PY_OUT}} install --link=${{PYTHON_INSTALL_LINK}})
+
+      # wheel of the python modules in build/dist: cmake --build build --target wheel-python
+      add_custom_target(wheel-python
+      DEPENDS ${{SWIG_TARGETS}}
+      COMMAND python3 ${{INSTALL_PY_OUT}} wheel)
 
       """))
 
     # if python script processing the options failed
     message = f'message(FATAL_ERROR "${{OPTIONS}} Forcing cmake to stop.")'
     content += "\nelse()\n" + add_indents(inspect.cleandoc(message)) + "\nendif()"
-    with open(os.path.join(cmake_root, "CMakeLists.txt"), 'w') as f:
-        f.write(content)
+    write_if_changed(os.path.join(cmake_root, "CMakeLists.txt"), content)
+
+    if use_accelerate:
+        write_script(accelerate.configure_script, accelerate.configure_script_content())
+        write_script(accelerate.build_script, accelerate.build_script_content())
+
+    if use_pgo:
+        write_script(optimize.pgo_script, optimize.pgo_script_content(use_swig_python))
+
+    if use_benchmark:
+        write_script(benchmark.bench_script, benchmark.bench_script_content())
+
+def write_script(name, content):
+    # shell script in the project root
+    location = os.path.join(cmake_root, name)
+    write_if_changed(location, content)
+    os.chmod(location, 0o777)
+
+def library_targets(curr_rpath):
+    # (target, source files relative to the library directory) of the targets defined in a library directory
+    return [(f"${{NS}}{target}", [f"{'src' if is_library else 'apps'}/{name}.cpp" for name in names])
+        for target, names, is_library in link_targets(curr_rpath)]
+
+def add_unity_content(curr_rpath):
+    # unity build settings of the targets with several source files
+    patterns = unity.read_exclude_patterns(os.path.join(cmake_root, "scripts"))
+    content = ""
+    for target, sources in library_targets(curr_rpath):
+        # headers reached by each source, the ones without include guard can not be included twice into a batch
+        includes = {source: source_files(curr_rpath, remove_extension(source.split("/")[-1])) for source in sources}
+        content += unity.unity_content(target, sources, args["unity_batch_size"], patterns, cmake_root, curr_rpath, includes)
+    return "# unity build\n" + content if content else ""
+
+# library directory -> (translation units, chosen, rejected) precompiled header candidates, chosen before rendering
+pch_choices = {}
+
+def translation_unit_headers(rpath, name):
+    """
+    headers reached by a source file that can be precompiled: {header: is available to every target}
+
+    project headers are spelled as in the include directives ("A/AB/ABA/aba.h"), the headers of the library directory itself
+    (they change with the library) and headers without include guard are left out. System headers are available to every
+    target if they are on the default search path of the compiler
+    """
+    headers = {}
+    source = source_path(rpath, name)
+    own_include_dir = os.path.join(cmake_root, rpath, "include") + os.path.sep
+    for path in translation_unit_files(rpath, name):
+        for include in include_cache.find_includes(path):
+            if include.startswith("<"):
+                headers[include] = pch.resolve(include[1:-1])[1]
+        if path == source or path.startswith(own_include_dir) or not parse_includes.has_include_guard(path):
+            continue
+        include_dir = os.path.join(cmake_root, path[len(cmake_root) + 1:].split(os.path.sep + "include" + os.path.sep)[0], "include")
+        headers[path[len(include_dir) + 1:].replace(os.path.sep, "/")] = False
+    return headers
+
+def header_closure(header):
+    # files read by the compiler when the header is included
+    if header.startswith("<"):
+        return pch.system_closure(header[1:-1], include_cache.find_includes)
+    files = set(include_graph.closure((include_to_rpath(header), remove_extension(include_to_name(header))))["files"])
+    for path in list(files):
+        for include in include_cache.find_includes(path):
+            if include.startswith("<"):
+                files |= pch.system_closure(include[1:-1], include_cache.find_includes)
+    return files
+
+def translation_unit_bytes(rpath, name):
+    # bytes read by the compiler for a source file, project and system headers included
+    files = translation_unit_files(rpath, name)
+    for path in list(files):
+        for include in include_cache.find_includes(path):
+            if include.startswith("<"):
+                files |= pch.system_closure(include[1:-1], include_cache.find_includes)
+    return pch.measure(files)[1]
+
+def choose_pch(lib_dirs):
+    # ranks the precompiled header candidates of every library directory and writes build/pch_report.txt
+    for rpath in lib_dirs:
+        library_names = [names for _, names, is_library in link_targets(rpath) if is_library]
+        units = {name: translation_unit_headers(rpath, name) for names in library_names for name in names}
+        shared = len(library_names) > 1
+        chosen, rejected = pch.rank(units, header_closure, args["pch_count"], shared)
+        pch_choices[rpath] = (len(units), chosen, rejected)
+    write_if_changed(os.path.join(cmake_root, "build", "pch_report.txt"), pch.report_content(pch_choices))
+
+def header_spelling(key):
+    # project header as it is included from other library directories
+    return f"{key[0]}/{key[1]}.h".replace(os.path.sep, "/")
+
+def write_header_report(lib_dirs):
+    # header cost analysis of every translation unit, written to build/header_report.json and build/header_report.txt
+    units = {}
+    files = {}
+    headers = set()
+    for rpath in lib_dirs:
+        for source in library_files(rpath, "src", ".cpp") + library_files(rpath, "apps", ".cpp"):
+            name = remove_extension(source.split("/")[-1])
+            path = source_path(rpath, name)
+            direct = included_headers(rpath, extract_includes(rpath, name, False)[0])
+            reached = set()
+            for key in direct:
+                reached |= include_graph.closure(key)["keys"]
+            system = {include for file in {path} | {header_path(*key) for key in reached}
+                for include in include_cache.find_includes(file) if include.startswith("<")}
+            units[path] = {header_spelling(key) for key in reached} | system
+            files[path] = direct
+            headers |= reached
+    for key in headers:
+        files[header_path(*key)] = include_graph.node(key)[1]
+
+    includes = {path[len(cmake_root) + 1:].replace(os.path.sep, "/"): ([header_spelling(key) for key in direct],
+        header_report.used_names(header_report.read_text(path))) for path, direct in files.items()}
+    reach = {header_spelling(key): {header_spelling(other) for other in include_graph.closure(key)["keys"]} for key in headers}
+    names = {header_spelling(key): header_report.declared_names(header_report.read_text(header_path(*key))) for key in headers}
+    measure = lambda header: pch.measure(header_closure(header))
+    report = header_report.analyze({path[len(cmake_root) + 1:]: unit for path, unit in units.items()}, measure, includes, reach, names)
+
+    os.umask(0)
+    os.makedirs(os.path.join(cmake_root, "build"), mode=0o777, exist_ok=True)
+    write_if_changed(os.path.join(cmake_root, "build", "header_report.json"), header_report.json_content(report))
+    write_if_changed(os.path.join(cmake_root, "build", "header_report.txt"), header_report.text_content(report))
+    print(f"Header report written to {os.path.join(cmake_root, 'build', 'header_report.txt')}")
+
+def write_target_graph(lib_dirs):
+    """
+    graph of the libraries, executables and swig modules with the links of the generated scripts
+
+    targets are weighted by the compile times of the last Ninja build (build/.ninja_log), targets missing from the log
+    are estimated from the bytes read by the compiler (see target_graph.weigh). Written to build/target_graph.dot, .json and .txt
+    """
+    main_project = os.path.basename(cmake_root)
+    seconds = target_graph.read_ninja_log(os.path.join(cmake_root, "build", ".ninja_log"))
+    nodes = {}
+    edges = {}
+
+    def add_node(target, kind, rpath, units, size, links, cmake_target=None):
+        # cmake_target: name of the object directory of the target in the build tree
+        cmake_target = cmake_target or f"{main_project}.{target}"
+        nodes[target] = {"kind": kind, "rpath": rpath.replace(os.path.sep, "/"), "units": units, "bytes": size, "seconds": seconds.get(cmake_target)}
+        edges[target] = set(links)
+
+    for rpath in lib_dirs:
+        for target, names, is_library in link_targets(rpath):
+            deps = target_dependencies(rpath, target, names, is_library)["deps"]
+            links = deps["PUBLIC"] | deps["PRIVATE"]
+            if not is_library and lib_granularity == "object" and links:
+                links = {main_project}
+            size = sum(translation_unit_bytes(rpath, name) for name in names)
+            add_node(path_to_ns(rpath) + target, "library" if is_library else "executable", rpath, len(names), size, links)
+        if use_swig_python:
+            for interface in library_files(rpath, "swig", ".i"):
+                name = remove_extension(interface.split("/")[-1])
+                size = os.path.getsize(os.path.join(cmake_root, rpath, interface))
+                link = swig_link_target(rpath).replace("${NAME}", name).replace("${MAIN_PROJECT}", main_project)
+                # swig targets are not namespaced (see add_swig_content)
+                add_node(path_to_ns(rpath) + name + "SWIG", "swig", rpath, 1, size, [link], name + "SWIG")
+    if lib_granularity == "object":
+        # built from the objects of the object libraries, nothing is compiled for it
+        add_node(main_project, "library", "", 0, 0, [target for target, node in nodes.items() if node["kind"] == "library"], main_project)
+        if seconds:
+            nodes[main_project]["seconds"] = seconds.get(main_project, 0.0)
+
+    unit, estimated = target_graph.weigh(nodes)
+    analysis = target_graph.analyze(nodes, edges)
+
+    os.umask(0)
+    os.makedirs(os.path.join(cmake_root, "build"), mode=0o777, exist_ok=True)
+    location = os.path.join(cmake_root, "build", "target_graph")
+    write_if_changed(location + ".dot", target_graph.dot_content(nodes, edges, analysis))
+    write_if_changed(location + ".json", target_graph.json_content(nodes, edges, analysis))
+    write_if_changed(location + ".txt", target_graph.text_content(nodes, analysis, unit, estimated))
+    print(f"Target graph written to {location}.txt")
+
+def write_python_packages(lib_dirs):
+    # __init__.py of the python packages, copied to build/python by the swig scripts of the library directories
+    modules = {rpath: [remove_extension(os.path.basename(interface)) for interface in library_files(rpath, "swig", ".i")] for rpath in lib_dirs}
+    for path, (subpackages, names) in python_package.packages(modules).items():
+        location = os.path.join(cache_dir, "python", *path)
+        os.makedirs(location, mode=0o777, exist_ok=True)
+        write_if_changed(os.path.join(location, "__init__.py"), python_package.init_content(subpackages, names))
+
+def write_numpy_interfaces(lib_dirs):
+    # interfaces applying the numpy typemaps to the array parameters of the headers wrapped by swig/<name>.i
+    for rpath in lib_dirs:
+        for interface in library_files(rpath, "swig", ".i"):
+            with open(os.path.join(cmake_root, rpath, interface), 'r') as f:
+                text = f.read()
+            module = numpy_typemaps.module_regex.search(text)
+            if module is None:
+                raise ValueError(f"{os.path.join(rpath, interface)} has no %module directive")
+            signatures = []
+            for header in numpy_typemaps.interface_headers(text):
+                # headers are found in the include directory of the swig source (see add_swig_content)
+                for location in (os.path.join(cmake_root, rpath, "include", rpath, header), os.path.join(cmake_root, rpath, "include", header)):
+                    if os.path.exists(location):
+                        with open(location, 'r') as f:
+                            signatures += numpy_typemaps.array_signatures(f.read())
+                        break
+            location = os.path.join(cache_dir, "swig", rpath)
+            os.makedirs(location, mode=0o777, exist_ok=True)
+            content = numpy_typemaps.interface_content(module.group(0).strip(), interface, signatures)
+            write_if_changed(os.path.join(location, os.path.basename(interface)), content)
+
+def add_pch_content(curr_rpath):
+    targets = [f"${{NS}}{target}" for target, _, is_library in link_targets(curr_rpath) if is_library]
+    return pch.pch_content(targets, pch_choices[curr_rpath][1], "${NS}pch")
+
+def add_benchmark_content(curr_rpath):
+    # executables including <benchmark/benchmark.h>, benchmark::benchmark is linked through benchmark.extra_links
+    content = ""
+    for app in library_files(curr_rpath, "apps", ".cpp"):
+        location = os.path.join(cmake_root, curr_rpath, app)
+        if benchmark.is_benchmark(include_cache.find_includes(location)):
+            with open(location, 'r') as f:
+                content += benchmark.target_content(f"${{NS}}{remove_extension(os.path.basename(app))}", f.read())
+    return "# benchmarks\n" + content + "\n" if content else ""
+
+def library_content(curr_rpath):
+    content = init_content(curr_rpath) + add_lib_content(curr_rpath)
+    if not use_hidden_visibility:
+        content += fallback_export_content(curr_rpath)
+    if os.path.exists(os.path.join(cmake_root, curr_rpath, "apps")):
+        content += add_exe_content(curr_rpath)
+        if use_benchmark:
+            content += add_benchmark_content(curr_rpath)
+    if use_unity:
+        content += add_unity_content(curr_rpath)
+    if use_pch:
+        content += add_pch_content(curr_rpath)
+    if use_googletest:
+        content += f"include_directories(${{GTEST_INCLUDE_DIRS}})"
+        content += "\n\n"
+    if use_qt:
+        ui_files = library_files(curr_rpath, "src", ".ui") + library_files(curr_rpath, "apps", ".ui")
+        content += qt.add_qt_lib_content(files_content("QTFILES", ui_files))
+    with timer.span("link_contents", "link", rpath=curr_rpath):
+        content += link_contents(curr_rpath)
+    if use_swig_python:
+        content += add_swig_content(curr_rpath)
+    return content
+
+def render_library(curr_rpath):
+    # CMakeLists.txt content of a library directory and the inputs behind it
+    with timer.span(curr_rpath, "library"):
+        return library_content(curr_rpath), library_inputs(curr_rpath)
+
+def render_library_in_worker(curr_rpath):
+    # runs in a worker process with --jobs, the recorded spans and counters are sent back to the main process
+    if timer.pid != os.getpid():
+        timer.reset()
+    content, inputs = render_library(curr_rpath)
+    timer.maximum("include_depth", dependency_graph.max_depth)
+    return content, inputs, timer.take()
+
+def project_files(lib_dirs):
+    # source and header files of the library directories, these are the nodes of the include graph
+    files = []
+    for lib_dir in lib_dirs:
+        files += [source_path(lib_dir, name) for name in get_file_names(lib_dir)]
+        include_dir = os.path.join(cmake_root, lib_dir, "include", lib_dir)
+        files += [os.path.join(include_dir, name) for name in project["libraries"][lib_dir]["include"] if name.endswith(".h")]
+    return files
+
+def parse_files(files, executor=None):
+    # parses new or changed files up front (in parallel with an executor) so the library directories are rendered
+    # from the filled include cache
+    stale = []
+    for path in files:
+        if not os.path.isfile(path):
+            continue
+        if include_cache.is_fresh(path):
+            # served from the cache in the main process so the hit is counted with any number of jobs
+            include_cache.find_includes(path)
+        else:
+            stale.append(path)
+    known_hashes = [include_cache.entries[path]["hash"] if path in include_cache.entries else None for path in stale]
+    preamble = [include_cache.preamble] * len(stale)
+    if executor is None:
+        entries = map(read_entry_traced, stale, known_hashes, preamble)
+    else:
+        chunksize = max(1, len(stale) // (4 * jobs))
+        entries = []
+        for entry, taken in executor.map(read_entry_in_worker, stale, known_hashes, preamble, chunksize=chunksize):
+            timer.merge(taken)
+            entries.append(entry)
+    for path, entry in zip(stale, entries):
+        include_cache.add(path, entry)
+        timer.count("files_read")
+        timer.count("bytes_read", entry["size"])
+
+def read_entry_traced(file_path, known_hash, preamble):
+    with timer.span("find_includes", "parse", path=file_path[len(cmake_root) + 1:]):
+        return read_entry(file_path, known_hash, preamble)
+
+def read_entry_in_worker(file_path, known_hash, preamble):
+    # runs in a worker process with --jobs, the parse span is sent back to the main process like in render_library_in_worker
+    if timer.pid != os.getpid():
+        timer.reset()
+    return read_entry_traced(file_path, known_hash, preamble), timer.take()
+
+def analyze_project(lib_dirs):
+    # project wide checks and choices made once in the main process after parsing, the workers inherit the results
+    if lib_granularity == "directory":
+        with timer.phase("resolve"):
+            check_directory_cycles(lib_dirs)
+    if use_pch:
+        with timer.phase("pch"):
+            choose_pch(lib_dirs)
+
+def fork_context():
+    # the workers use the module state filled before the pools are created (options, include cache, pch choices) so they
+    # are forked, a spawned worker would import the script again. None where fork is not available (Windows)
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:
+        return None
+
+def render_libraries(libraries, lib_dirs):
+    # renders the library directories serially or in a process pool
+    # the results are returned in the order of libraries so the output does not depend on the number of jobs
+    files = project_files(lib_dirs) if libraries else []
+    timer.count("files", len(files))
+    context = fork_context() if jobs > 1 else None
+    if context is None or len(libraries) <= 1:
+        with timer.phase("parse"):
+            parse_files(files)
+        if libraries:
+            analyze_project(lib_dirs)
+        with timer.phase("render"):
+            return [render_library(rpath) for rpath in libraries]
+
+    # the workers rendering the libraries inherit the filled cache
+    with timer.phase("parse"):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+            parse_files(files, executor)
+    analyze_project(lib_dirs)
+
+    # dependency resolution runs in the workers so it is included in the render phase
+    with timer.phase("render"):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+            chunksize = max(1, len(libraries) // (4 * jobs))
+            results = []
+            for content, inputs, taken in executor.map(render_library_in_worker, libraries, chunksize=chunksize):
+                timer.merge(taken)
+                results.append((content, inputs))
+            return results
+
+def create_cmakelists(tree, manifest, lib_dirs):
+    # returns (library directory, CMakeLists.txt written, inputs) of the rendered library directories
+    libraries = []
+    rendered = []
+    # CMakeLists.txt of the directories with subdirectories, written with the libraries after the project checks
+    callers = []
 
-def create_cmakelists(tree):
     def create_cmakelists_helper(tree, rpath):
         for folder in tree.keys():
             curr_rpath = os.path.join(rpath, folder)
             # directory with subdiectories
             if(tree[folder]):
-                with open(os.path.join(cmake_root, curr_rpath, "CMakeLists.txt"), 'w') as f:
-                    f.write(header_content() + inspect.cleandoc(caller_content(curr_rpath, tree[folder].keys())))
+                content = header_content() + inspect.cleandoc(caller_content(curr_rpath, tree[folder].keys()))
+                callers.append((os.path.join(cmake_root, curr_rpath, "CMakeLists.txt"), content))
                 create_cmakelists_helper(tree[folder], curr_rpath)
             # directory with source and header files
             else:
                 add_to_build_info(curr_rpath, True)
                 add_to_build_info(curr_rpath, False)
-                with open(os.path.join(cmake_root, curr_rpath, "CMakeLists.txt"), 'w') as f:
-                    content = init_content(curr_rpath) + add_lib_content(curr_rpath)
-                    if os.path.exists(os.path.join(cmake_root, curr_rpath, "apps")):
-                        content += add_exe_content(curr_rpath)
-                    if use_googletest:
-                        content += f"include_directories(${{GTEST_INCLUDE_DIRS}})"
-                        content += "\n\n"
-                    if use_qt:
-                        content += qt.add_qt_lib_content(curr_rpath)
-                    content += link_contents(curr_rpath)
-                    if use_swig_python:
-                        content += add_swig_content(curr_rpath)
-                    f.write(content)
-    
-    create_cmakelists_helper(tree, "")
+                path = os.path.join(cmake_root, curr_rpath, "CMakeLists.txt")
+                if not (args["incremental"] and manifest.is_up_to_date(curr_rpath, path, input_hash)):
+                    libraries.append(curr_rpath)
+
+    def input_hash(rpath):
+        return include_cache.content_hash(os.path.join(cmake_root, rpath))
+
+    with timer.phase("check"):
+        create_cmakelists_helper(tree, "")
+    timer.count("libraries", len(lib_dirs))
+    timer.count("rendered", len(libraries))
+
+    # build_info fragments are collected in tree order above, library contents are merged in the same order
+    results = render_libraries(libraries, lib_dirs)
+    with timer.phase("write"):
+        for path, content in callers:
+            write_if_changed(path, content)
+        for curr_rpath, (content, inputs) in zip(libraries, results):
+            with timer.span("write", "write", rpath=curr_rpath):
+                written = write_if_changed(os.path.join(cmake_root, curr_rpath, "CMakeLists.txt"), content)
+                if written:
+                    timer.count("files_written")
+            manifest.record(curr_rpath, inputs, content)
+            rendered.append((curr_rpath, written, inputs))
+    return rendered
+
+def generate():
+    """
+    generates the project files from the scanned layout
 
-if __name__ == "__main__":
-    if args["clean"]:
-        clean()
-    else:
-        print("Generating CMakeLists.txt files ...")
+    returns the library directories rendered by create_cmakelists and whether the build_info fragments were written
+    """
+    with timer.span("get_lib_dirs", "setup"):
         lib_dirs = get_lib_dirs()
 
+    os.umask(0)
+    os.makedirs(cache_dir, mode=0o777, exist_ok=True)
+    write_if_changed(os.path.join(cache_dir, "project_index.json"), project_scanner.index_content(project))
+
+    with timer.span("buildTree", "setup"):
         tree = buildTree(lib_dirs)
 
-        create_top_cmakelists()
+    if use_unity and all(len(sources) <= 1 for lib_dir in lib_dirs for _, sources in library_targets(lib_dir)):
+        print("unity builds are not enabled on any target: every target is built from a single source file")
+
+    with timer.phase("check"):
+        manifest = Manifest(os.path.join(cache_dir, "manifest.json"), generation_options_key())
+
+    # the build_info fragments are collected again by create_cmakelists
+    for lines in build_info.values():
+        lines.clear()
+    rendered = create_cmakelists(tree, manifest, lib_dirs)
+    # written after the library directories, nothing is written if the project fails the checks of create_cmakelists
+    create_top_cmakelists()
+
+    if args["header_report"]:
+        with timer.phase("header_report"):
+            write_header_report(lib_dirs)
+    if args["target_graph"]:
+        with timer.phase("target_graph"):
+            write_target_graph(lib_dirs)
+
+    with timer.phase("write"):
+        info_written = write_build_info()
+        if use_swig_python:
+            write_python_packages(lib_dirs)
+        if use_swig_numpy:
+            write_numpy_interfaces(lib_dirs)
+        manifest.save()
+        include_cache.save()
+    return rendered, info_written
+
+def build_targets(lib_dirs):
+    """
+    targets that can be requested with --build_only: name without the project prefix -> (CMake target, node)
+
+    a node is (library directory, target, source names, is library) as returned by link_targets, swig modules are
+    represented by the library they are linked to
+    """
+    project_name = cmake_root.split(os.path.sep)[-1]
+    targets = {}
+    for rpath in lib_dirs:
+        libraries = {}
+        for target, names, is_library in link_targets(rpath):
+            targets[path_to_ns(rpath) + target] = (f"{project_name}.{path_to_ns(rpath)}{target}", (rpath, target, names, is_library))
+            if is_library:
+                libraries[target] = names
+        if use_swig_python:
+            for interface in library_files(rpath, "swig", ".i"):
+                name = remove_extension(os.path.basename(interface))
+                library = name if lib_granularity == "file" else rpath.split(os.path.sep)[-1]
+                targets[f"{path_to_ns(rpath)}{name}SWIG"] = (f"{name}SWIG", (rpath, library, libraries.get(library, []), True))
+    return targets
+
+def build_closure(nodes, lib_dirs):
+    """
+    library directories needed to build the targets of the nodes
+
+    the libraries linked by the targets are needed transitively (the objects of every reached directory with the
+    object granularity). Every target of an enabled directory is configured even if it is not built, so the interface
+    targets of the header-only libraries it includes (their include directories) have to exist as well
+    """
+    directories = set()
+    visited = set()
+    # (node, linked): the libraries of a node are followed only if it is linked to a requested target
+    stack = [(node, True) for node in nodes]
+
+    def add_directory(rpath):
+        if not rpath in directories:
+            directories.add(rpath)
+            stack.extend(((rpath, *link_target), False) for link_target in link_targets(rpath))
+
+    while stack:
+        (rpath, target, names, is_library), linked = stack.pop()
+        if (rpath, target, linked) in visited:
+            continue
+        visited.add((rpath, target, linked))
+        add_directory(rpath)
+        dependencies = target_dependencies(rpath, target, names, is_library)
+        for access in ("PUBLIC", "PRIVATE"):
+            interfaces = dependencies["required_include_dirs"][access] - dependencies["included_dirs"][access]
+            for include in interfaces:
+                if include.replace("/", os.path.sep) in lib_dirs:
+                    add_directory(include.replace("/", os.path.sep))
+            if not linked:
+                continue
+            for dep in dependencies["deps"][access]:
+                dep_rpath = os.path.sep.join(dep.split(".")[:-1])
+                stack.extend(((dep_rpath, *link_target), True) for link_target in link_targets(dep_rpath) if link_target[0] == dep.split(".")[-1])
+            if lib_granularity == "object":
+                for include in dependencies["included_dirs"][access]:
+                    if include.replace("/", os.path.sep) in lib_dirs:
+                        stack.extend(((include.replace("/", os.path.sep), *link_target), True) for link_target in link_targets(include.replace("/", os.path.sep)) if link_target[2])
+    return directories
+
+def write_build_only(requested, lib_dirs):
+    # FORCE options of the library directories needed by the requested targets, written as a CMake preset
+    project_name = cmake_root.split(os.path.sep)[-1]
+    targets = build_targets(lib_dirs)
+    names = []
+    for name in requested:
+        name = name[len(project_name) + 1:] if name.startswith(project_name + ".") else name
+        if not name in targets:
+            print(f"Error. {name} is not a target of the project. Targets: {', '.join(sorted(targets))}")
+            sys.exit(1)
+        names.append(name)
+    directories = build_closure([targets[name][1] for name in names], lib_dirs)
+    build, no_build = build_only.force_options(buildTree(lib_dirs), directories)
+
+    preset = build_only.preset_name(names)
+    location = os.path.join(cmake_root, build_only.presets_file)
+    cmake_targets = [targets[name][0] for name in names]
+    write_if_changed(location, build_only.presets_content(location, preset, cmake_targets, build, no_build))
+    print(f"Library directories needed by {', '.join(names)} ({len(directories)} of {len(lib_dirs)}): {', '.join(sorted(directories))}")
+    print(f"configure.sh arguments: {build_only.force_arguments(build, no_build)}")
+    print(f"Preset {preset} written to {location}: cmake --preset {preset} && cmake --build --preset {preset}")
+
+def watched_paths():
+    # files and directories watched by --watch: the inputs of the generation, the generator scripts and the scanned directories
+    lib_dirs = get_lib_dirs()
+    files = project_files(lib_dirs)
+    for rpath in lib_dirs:
+        for folder, extension in (("swig", ".i"), ("src", ".ui"), ("apps", ".ui")):
+            files += [os.path.join(cmake_root, rpath, name) for name in library_files(rpath, folder, extension)]
+    scripts_dir = os.path.join(cmake_root, "scripts")
+    files += [os.path.join(scripts_dir, name) for name in sorted(os.listdir(scripts_dir)) if name.endswith((".py", ".txt", ".in"))]
+    files.append(os.path.join(cmake_root, project_scanner.ignore_file))
+    directories = [cmake_root, os.path.join(cmake_root, "scripts")] + [os.path.join(cmake_root, rpath) for rpath in project["directories"]]
+    return files, directories
+
+def invalidate(changed, layout_changed):
+    # drops what is kept in memory about the changed files, every node of the include graphs if the layout changed
+    include_cache.invalidate(changed)
+    for graph in (dependency_graph, include_graph):
+        graph.invalidate(None if layout_changed else [key for key in graph.nodes if header_path(*key) in changed])
+
+def watch_project():
+    """
+    regenerates the project whenever one of its files changes, until it is interrupted (--watch)
+
+    the layout, the include cache and the include graphs stay in memory between the generations. Only the entries of the
+    changed files are dropped and the project is regenerated incrementally, so only the library directories reaching a
+    changed file are rendered again. The layout is scanned again when a directory changes, changed generator scripts restart the process
+    """
+    global project, subdirs
+    args["incremental"] = True
+    files, directories = watched_paths()
+    watcher = watch.create_watcher(files, directories, args["watch_interval"], not args["watch_polling"])
+    print(f"Watching {len(files)} files in {len(directories)} directories ({watcher.name}), press Ctrl+C to stop ...")
+    scripts_dir = os.path.join(cmake_root, "scripts") + os.path.sep
+    try:
+        while True:
+            changed, layout_changed = watcher.wait()
+            start = time.perf_counter()
+            if any(path.startswith(scripts_dir) for path in changed):
+                print(f"{', '.join(sorted(os.path.basename(path) for path in changed))} changed, restarting ...")
+                watcher.close()
+                os.execv(sys.executable, [sys.executable] + sys.argv)
+            log = [f"  {'modified' if os.path.exists(path) else 'removed'}: {path[len(cmake_root) + 1:]}" for path in sorted(changed)]
+            old_lib_dirs = set(get_lib_dirs())
+            if layout_changed or os.path.join(cmake_root, project_scanner.ignore_file) in changed:
+                old_files = set(files)
+                old_index = project_scanner.index_content(project)
+                project = project_scanner.scan(cmake_root)
+                subdirs = project["folders"]
+                layout_changed = project_scanner.index_content(project) != old_index
+                if layout_changed:
+                    files, directories = watched_paths()
+                    watcher.update(files, directories)
+                    log += [f"  added: {path[len(cmake_root) + 1:]}" for path in sorted(set(files) - old_files)]
+            if not changed and not layout_changed:
+                continue
+
+            file_count = len(log)
+            invalidate(changed, layout_changed)
+            rendered, info_written = generate()
+            relative_changed = {path[len(cmake_root) + 1:] for path in changed}
+            for rpath, written, inputs in rendered:
+                if not rpath in old_lib_dirs:
+                    reason = "new library directory"
+                elif relative_changed.intersection(inputs):
+                    reason = "changed: " + ", ".join(sorted(relative_changed.intersection(inputs)))
+                elif layout_changed:
+                    reason = "the project layout changed"
+                else:
+                    reason = "its CMakeLists.txt or the generator options changed"
+                log.append(f"  {os.path.join(rpath, 'CMakeLists.txt')}: {'regenerated' if written else 'unchanged'} ({reason})")
+            if info_written:
+                log.append(f"  {os.path.join('build', 'include', 'build_info.h.in')}: regenerated (library directories changed)")
+            elapsed = 1000 * (time.perf_counter() - start)
+            print(f"[{time.strftime('%H:%M:%S')}] changed files: {file_count}, {len(rendered)} of {len(get_lib_dirs())} library directories rendered in {elapsed:.1f} ms")
+            print("\n".join(log))
+    except KeyboardInterrupt:
+        print("Watching has been stopped.")
+    finally:
+        watcher.close()
 
-        create_cmakelists(tree)
+if __name__ == "__main__":
+    if args["clean"]:
+        clean()
+    else:
+        print("Generating CMakeLists.txt files ...")
+        generate()
+        if args["cache_stats"]:
+            print(include_cache.stats())
+        timer.count("parsed", include_cache.misses)
+        timer.count("cache_hits", include_cache.hits + include_cache.rehashed)
+        timer.maximum("include_depth", dependency_graph.max_depth)
+        if args["timings"]:
+            timer.save(args["timings"])
+        if args["trace"]:
+            timer.save_trace(args["trace"])
+        if args["profile"]:
+            print(timer.summary())
 
         print("Generation has been completed.")
+        if args["build_only"]:
+            write_build_only(args["build_only"], get_lib_dirs())
+        if args["watch"]:
+            watch_project()
 
 
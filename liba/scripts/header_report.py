@@ -0,0 +1,112 @@
+import json
+import re
+
+# names a header makes available: types, aliases, functions, macros and namespaces (overapproximated, a false positive only
+# hides an unused include)
+declaration_regex = re.compile(r'\b(?:(?:class|struct|union|enum(?:\s+class)?)\s+(?:[A-Z_][A-Z0-9_]*\s+)?|(?:(?<!using )namespace|using(?! namespace))\s+)(\w+)|\b(?:typedef|extern)\b[^;{]*\b(\w+)\s*;|\b(\w+)\s*\([^;{}]*\)\s*(?:const\s*)?(?:noexcept\s*)?[;{]')
+macro_regex = re.compile(r'^[ \t]*#[ \t]*define[ \t]+(\w+)', re.MULTILINE)
+namespace_regex = re.compile(r'\bnamespace\b|\bextern\s*$')
+identifier_regex = re.compile(r'\b[A-Za-z_]\w*\b')
+# comments, string literals and the include directives themselves do not use the names of an include
+strip_regex = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:[^"\\\n]|\\.)*"|^[ \t]*#[ \t]*include[^\n]*', re.DOTALL | re.MULTILINE)
+# preprocessor conditions like #if __has_include(...) are not declarations (macros are read before)
+directive_regex = re.compile(r'^[ \t]*#[^\n]*', re.MULTILINE)
+
+keywords = {"if", "for", "while", "switch", "return", "sizeof", "catch", "decltype", "alignof", "static_assert", "defined"}
+
+def read_text(path):
+    try:
+        with open(path, 'r', errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+def namespace_scope(text):
+    # text outside of class and function bodies, members are only used through the name of their class
+    scope = []
+    kinds = []
+    start = 0
+    for pos, char in enumerate(text):
+        if char == "{":
+            if all(kinds):
+                scope.append(text[start:pos + 1])
+                head = text[start:pos].split(";")[-1].split("}")[-1]
+                kinds.append(namespace_regex.search(head) is not None)
+            else:
+                kinds.append(False)
+            start = pos + 1
+        elif char == "}" and kinds:
+            if all(kinds):
+                scope.append(text[start:pos + 1])
+            kinds.pop()
+            start = pos + 1
+        elif char == ";" and not all(kinds):
+            start = pos + 1
+    if all(kinds):
+        scope.append(text[start:])
+    return " ".join(scope)
+
+def declared_names(text):
+    names = set(macro_regex.findall(text))
+    text = namespace_scope(directive_regex.sub(" ", strip_regex.sub(" ", text)))
+    for match in declaration_regex.finditer(text):
+        names.add(next(name for name in match.groups() if name))
+    return names - keywords
+
+def used_names(text):
+    return set(identifier_regex.findall(strip_regex.sub(" ", text)))
+
+def analyze(units, measure, includes, reach, names):
+    """
+    header cost analysis of the project
+
+    units: translation unit -> headers reached by it (project headers as included, system headers as <...>)
+    measure: header -> (files, bytes) of its transitive closure
+    includes: project file -> (direct project includes, names used by the file)
+    reach: project header -> project headers reached by it
+    names: project header -> names declared by it
+
+    the compile cost of a header is estimated as the bytes of its closure multiplied by the translation units reaching it.
+    An include is redundant if another include of the same file already reaches it (and not the other way around, as in a cycle).
+    An include is unused if the file does not mention any name declared by the header or the headers it reaches
+    """
+    fan_in = {}
+    for headers in units.values():
+        for header in headers:
+            fan_in[header] = fan_in.get(header, 0) + 1
+    headers = []
+    for header, num_units in fan_in.items():
+        files, size = measure(header)
+        headers.append({"header": header, "files": files, "bytes": size, "units": num_units, "cost": size * num_units})
+    headers.sort(key=lambda entry: (-entry["cost"], entry["header"]))
+
+    redundant = []
+    unused = []
+    for file, (direct, used) in sorted(includes.items()):
+        for include in direct:
+            covering = sorted(other for other in direct if other != include and include in reach[other] and not other in reach[include])
+            if covering:
+                redundant.append({"file": file, "include": include, "reached_through": covering})
+            provided = set(names[include])
+            for header in reach[include]:
+                provided |= names[header]
+            if provided and not provided & used:
+                unused.append({"file": file, "include": include})
+    return {"translation_units": len(units), "headers": headers, "redundant_includes": redundant, "unused_includes": unused}
+
+def json_content(report):
+    return json.dumps(report, indent=1, sort_keys=True)
+
+def text_content(report, limit=30):
+    # ranked summary of the report
+    lines = [f"header cost: closure bytes * translation units reaching the header ({report['translation_units']} translation units)", ""]
+    lines.append(f"{'cost':>14} {'units':>6} {'files':>6} {'bytes':>10}  header")
+    for entry in report["headers"][:limit]:
+        lines.append(f"{entry['cost']:>14} {entry['units']:>6} {entry['files']:>6} {entry['bytes']:>10}  {entry['header']}")
+    lines += ["", f"redundant includes ({len(report['redundant_includes'])}), already reached through another include of the file:"]
+    for entry in report["redundant_includes"]:
+        lines.append(f"  {entry['file']}: {entry['include']} (through {', '.join(entry['reached_through'])})")
+    lines += ["", f"possibly unused includes ({len(report['unused_includes'])}), none of their names is used by the file:"]
+    for entry in report["unused_includes"]:
+        lines.append(f"  {entry['file']}: {entry['include']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import parse_includes
+
+class IncludeCache:
+    """
+    persistent cache for the include lists returned by parse_includes
+
+    entries are stored under build/.cmakegen and keyed by file path. An entry is reused when the
+    mtime and size of the file did not change, otherwise the file is read and its content hash is compared.
+    Only new or changed files are parsed again.
+    """
+
+    # bump it when the format of the entries or the parser output changes
+    version = 2
+
+    def __init__(self, location=None, preamble=False):
+        # location is None when the persistent cache is disabled
+        self.location = location
+        # only the include preamble of the files is parsed (see parse_includes.find_includes)
+        self.preamble = preamble
+        self.entries = {}
+        # include lists parsed or loaded during this run
+        self.memo = {}
+        self.dirty = False
+        self.hits = 0
+        self.rehashed = 0
+        self.misses = 0
+        self.memo_hits = 0
+        if location is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.location, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == IncludeCache.version and data.get("preamble") == self.preamble:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        if self.location is None or not self.dirty:
+            return
+        # drop entries of deleted files
+        entries = {path: entry for path, entry in self.entries.items() if path in self.memo or os.path.exists(path)}
+        os.umask(0)
+        os.makedirs(os.path.dirname(self.location), mode=0o777, exist_ok=True)
+        tmp_location = self.location + ".tmp"
+        with open(tmp_location, 'w') as f:
+            f.write(json.dumps({"version": IncludeCache.version, "preamble": self.preamble, "entries": entries}))
+        os.replace(tmp_location, self.location)
+        self.dirty = False
+
+    def find_includes(self, file_path):
+        # same as parse_includes.find_includes but only parses new or changed files
+        if file_path in self.memo:
+            self.memo_hits += 1
+            return self.memo[file_path]
+
+        if self.is_fresh(file_path):
+            self.hits += 1
+            includes = self.entries[file_path]["includes"]
+        else:
+            entry = self.entries.get(file_path)
+            includes = self.add(file_path, read_entry(file_path, entry["hash"] if entry else None, self.preamble))
+
+        self.memo[file_path] = includes
+        return includes
+
+    def invalidate(self, file_paths):
+        # changed files are validated again against their stored entries on the next lookup
+        for file_path in file_paths:
+            self.memo.pop(file_path, None)
+
+    def is_fresh(self, file_path):
+        # the include list of the file can be served without reading it
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return False
+        stat = os.stat(file_path)
+        return entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+    def add(self, file_path, entry):
+        # stores an entry returned by read_entry (which might have been called from a worker process)
+        if entry["includes"] is None:
+            # touched but not modified
+            self.rehashed += 1
+            entry["includes"] = self.entries[file_path]["includes"]
+        else:
+            self.misses += 1
+        self.entries[file_path] = entry
+        self.memo[file_path] = entry["includes"]
+        self.dirty = True
+        return entry["includes"]
+
+    def content_hash(self, file_path):
+        # content hash of the file validated the same way as the include lists, None if it does not exist
+        if file_path not in self.memo and not os.path.isfile(file_path):
+            return None
+        self.find_includes(file_path)
+        return self.entries[file_path]["hash"]
+
+    def stats(self):
+        lookups = self.hits + self.rehashed + self.misses
+        hit_rate = 100.0 * (self.hits + self.rehashed) / lookups if lookups else 0.0
+        state = "disabled" if self.location is None else self.location
+        return (f"include cache ({state}):\n"
+            f"  files: {lookups}, hits: {self.hits}, rehashed: {self.rehashed}, parsed: {self.misses} ({hit_rate:.1f}% hit rate)\n"
+            f"  repeated lookups served from memory: {self.memo_hits}")
+
+def read_entry(file_path, known_hash=None, preamble=False):
+    # reads and parses a file, includes is None if the content hash equals known_hash
+    stat = os.stat(file_path)
+    with parse_includes.open_buffer(file_path) as buffer:
+        digest = hashlib.sha1(buffer).hexdigest()
+        includes = None if digest == known_hash else parse_includes.find_includes_in_text(buffer, preamble)
+    return {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": digest, "includes": includes}
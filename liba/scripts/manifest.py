@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+def content_hash(content):
+    return hashlib.sha1(content.encode() if isinstance(content, str) else content).hexdigest()
+
+class Manifest:
+    """
+    records the inputs behind each generated library CMakeLists.txt file
+
+    options_key fingerprints everything shared by the libraries (command line options, extra_libs.txt,
+    project layout and the generator scripts). When it changes every library is regenerated,
+    otherwise a library is regenerated only if one of its recorded input files or its output changed.
+    """
+
+    version = 2
+
+    def __init__(self, location, options_key):
+        self.location = location
+        self.options_key = options_key
+        # rpath -> {"inputs": [paths], "output": hash}
+        self.libraries = {}
+        # path -> content hash, shared by the libraries
+        self.files = {}
+        # path -> True if the file did not change (each input is checked once)
+        self.checked = {}
+        self.dirty = False
+        try:
+            with open(location, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == Manifest.version and data.get("options") == options_key:
+                paths = [path for path, _ in data["files"]]
+                self.files = dict(data["files"])
+                self.libraries = {rpath: {"inputs": [paths[i] for i in entry["inputs"]], "output": entry["output"]}
+                    for rpath, entry in data["libraries"].items()}
+            else:
+                self.dirty = True
+        except (OSError, ValueError, KeyError):
+            self.dirty = True
+
+    def is_up_to_date(self, rpath, output_path, input_hash):
+        # input_hash returns the current content hash of an input file (None if it does not exist anymore)
+        entry = self.libraries.get(rpath)
+        if entry is None:
+            return False
+        try:
+            with open(output_path, 'rb') as f:
+                if content_hash(f.read()) != entry["output"]:
+                    return False
+        except OSError:
+            return False
+        for path in entry["inputs"]:
+            if path not in self.checked:
+                self.checked[path] = input_hash(path) == self.files.get(path)
+            if not self.checked[path]:
+                return False
+        return True
+
+    def record(self, rpath, inputs, content):
+        # inputs: {path: content hash}
+        self.libraries[rpath] = {"inputs": sorted(inputs), "output": content_hash(content)}
+        self.files.update(inputs)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        paths = sorted({path for entry in self.libraries.values() for path in entry["inputs"]})
+        index = {path: i for i, path in enumerate(paths)}
+        data = {
+            "version": Manifest.version,
+            "options": self.options_key,
+            "files": [[path, self.files[path]] for path in paths],
+            "libraries": {rpath: {"inputs": [index[path] for path in entry["inputs"]], "output": entry["output"]}
+                for rpath, entry in sorted(self.libraries.items())}
+        }
+        os.umask(0)
+        os.makedirs(os.path.dirname(self.location), mode=0o777, exist_ok=True)
+        tmp_location = self.location + ".tmp"
+        with open(tmp_location, 'w') as f:
+            f.write(json.dumps(data))
+        os.replace(tmp_location, self.location)
+        self.dirty = False
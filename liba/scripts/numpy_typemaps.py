@@ -0,0 +1,136 @@
+import inspect
+import re
+
+# element types -> numpy type code
+type_codes = {
+    "signed char": "NPY_BYTE", "unsigned char": "NPY_UBYTE", "short": "NPY_SHORT", "unsigned short": "NPY_USHORT",
+    "int": "NPY_INT", "unsigned int": "NPY_UINT", "unsigned": "NPY_UINT", "long": "NPY_LONG", "unsigned long": "NPY_ULONG",
+    "long long": "NPY_LONGLONG", "unsigned long long": "NPY_ULONGLONG", "float": "NPY_FLOAT", "double": "NPY_DOUBLE",
+    "int8_t": "NPY_INT8", "int16_t": "NPY_INT16", "int32_t": "NPY_INT32", "int64_t": "NPY_INT64",
+    "uint8_t": "NPY_UINT8", "uint16_t": "NPY_UINT16", "uint32_t": "NPY_UINT32", "uint64_t": "NPY_UINT64"
+}
+type_codes.update({f"std::{name}": code for name, code in type_codes.items() if name.endswith("_t")})
+# types of the array lengths
+dim_types = {"int", "unsigned", "unsigned int", "long", "unsigned long", "long long", "size_t", "std::size_t", "ptrdiff_t", "std::ptrdiff_t"}
+# numpy.i instantiates its typemaps for these element types with int lengths, other combinations are instantiated by the interface
+default_types = {name for name in type_codes if not name.startswith("std::") and name != "unsigned"}
+
+comment_regex = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+module_regex = re.compile(r'^[ \t]*%module\b[^\n]*', re.MULTILINE)
+header_regex = re.compile(r'^[ \t]*%include[ \t]*"([^"]+\.(?:h|hpp|hh|hxx))"', re.MULTILINE)
+# parameter list of a function declaration or definition
+function_regex = re.compile(r'\b\w+\s*\(([^()]*)\)\s*(?:const\s*)?(?:noexcept\s*)?(?:override\s*)?[;{]')
+pointer_regex = re.compile(r'^(const\s+)?([\w:]+(?:\s+[\w:]+)*?)\s*\*\s*(\w+)$')
+dim_regex = re.compile(r'^(?:const\s+)?([\w:]+(?:\s+[\w:]+)*?)\s+(\w+)$')
+vector_regex = re.compile(r'^const\s+std::vector\s*<\s*([\w:]+(?:\s+[\w:]+)*?)\s*>\s*&\s*(\w+)$')
+
+def split_parameters(parameters):
+    # commas of template arguments do not separate parameters, default values are dropped
+    result = []
+    depth = 0
+    current = ""
+    for char in parameters:
+        depth += {"<": 1, ">": -1}.get(char, 0)
+        if char == "," and depth == 0:
+            result.append(current)
+            current = ""
+        else:
+            current += char
+    result.append(current)
+    return [" ".join(parameter.split("=")[0].split()) for parameter in result if parameter.strip()]
+
+def array_signatures(text):
+    """
+    array parameters of the functions declared in a header
+
+    returns (kind, element type, length type, parameters as written) of
+    pointer + length pairs in any order: "in" for const pointers, "inplace" for the other ones (modified in place)
+    and "vector" for const std::vector<element type>& parameters
+    """
+    signatures = []
+    for match in function_regex.finditer(comment_regex.sub(" ", text)):
+        parameters = split_parameters(match.group(1))
+        used = set()
+        for i, parameter in enumerate(parameters):
+            vector = vector_regex.match(parameter)
+            if vector and vector.group(1) in type_codes:
+                signatures.append(("vector", vector.group(1), None, (parameter,)))
+                continue
+            if i + 1 == len(parameters) or i in used:
+                continue
+            for pointer_pos, dim_pos in ((i, i + 1), (i + 1, i)):
+                pointer = pointer_regex.match(parameters[pointer_pos])
+                dim = dim_regex.match(parameters[dim_pos])
+                if pointer and dim and pointer.group(2) in type_codes and dim.group(1) in dim_types:
+                    kind = "in" if pointer.group(1) else "inplace"
+                    signatures.append((kind, pointer.group(2), dim.group(1), (parameters[i], parameters[i + 1])))
+                    used.add(i + 1)
+                    break
+    return signatures
+
+def interface_headers(text):
+    # headers wrapped by an interface (%include "<header>")
+    return header_regex.findall(comment_regex.sub(" ", text))
+
+def vector_typemaps_content():
+    # typemaps of const std::vector<DATA_TYPE>& NUMPY_VECTOR, the vector is filled from the buffer of the array with a single copy
+    return inspect.cleandoc("""
+    %define %numpy_vector_typemaps(DATA_TYPE, DATA_TYPECODE)
+    %typecheck(SWIG_TYPECHECK_DOUBLE_ARRAY, fragment="NumPy_Macros")
+      const std::vector<DATA_TYPE>& NUMPY_VECTOR
+    {
+      $1 = is_array($input) || PySequence_Check($input);
+    }
+    %typemap(in, fragment="NumPy_Fragments")
+      const std::vector<DATA_TYPE>& NUMPY_VECTOR
+      (std::vector<DATA_TYPE> temp, PyArrayObject* array=NULL, int is_new_object=0)
+    {
+      array = obj_to_array_contiguous_allow_conversion($input, DATA_TYPECODE, &is_new_object);
+      if (!array || !require_dimensions(array, 1)) SWIG_fail;
+      temp.assign((DATA_TYPE*) array_data(array), (DATA_TYPE*) array_data(array) + array_size(array, 0));
+      $1 = &temp;
+    }
+    %typemap(freearg)
+      const std::vector<DATA_TYPE>& NUMPY_VECTOR
+    {
+      if (is_new_object$argnum && array$argnum)
+        { Py_DECREF(array$argnum); }
+    }
+    %enddef
+    """)
+
+def interface_content(module, interface, signatures):
+    """
+    swig interface wrapping swig/<name>.i with the numpy typemaps of its array parameters
+
+    the %apply directives come before the interface so they are used by the declarations it wraps, pointer + length parameters get the
+    buffer of the array without copying (IN_ARRAY1 converts arrays of an other type or layout, INPLACE_ARRAY1 requires a matching array)
+    """
+    lines = [f"// generated by scripts/generate_cmake.py (--swig_numpy): numpy typemaps of {interface}", module, "",
+        "%{", "#define SWIG_FILE_WITH_INIT", "%}", '%include "numpy.i"', "%init %{", "import_array();", "%}", ""]
+    instantiated = set()
+    applied = set()
+    vectors = False
+    for kind, element_type, dim_type, parameters in signatures:
+        if kind == "vector":
+            if not vectors:
+                lines += ["%{", "#include <vector>", "%}", vector_typemaps_content()]
+                vectors = True
+            if not (element_type, None) in instantiated:
+                lines.append(f"%numpy_vector_typemaps({element_type}, {type_codes[element_type]})")
+                instantiated.add((element_type, None))
+            typemap = f"const std::vector<{element_type}>& NUMPY_VECTOR"
+        else:
+            if (element_type not in default_types or dim_type != "int") and not (element_type, dim_type) in instantiated:
+                lines.append(f"%numpy_typemaps({element_type}, {type_codes[element_type]}, {dim_type})")
+                instantiated.add((element_type, dim_type))
+            array = f"{element_type}* {kind.upper()}_ARRAY1"
+            pointer_first = "*" in parameters[0]
+            typemap = f"({array}, {dim_type} DIM1)" if pointer_first else f"({dim_type} DIM1, {array})"
+        target = ", ".join(parameters)
+        target = f"({target})" if len(parameters) > 1 else target
+        if not target in applied:
+            lines.append(f"%apply {typemap} {{{target}}};")
+            applied.add(target)
+    lines += ["", f'%include "{interface}"']
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,85 @@
+import inspect
+
+pgo_script = "pgo.sh"
+
+# training workloads run against the instrumented build, the demo scripts under the project root
+training_scripts = ["run-exe.sh", "run-ctest.sh", "run-python.sh"]
+
+def cmake_content(use_ipo, use_pgo):
+    """
+    top level CMake script of the optimized Release profiles
+
+    ipo: interprocedural (link time) optimization of the Release builds if CheckIPOSupported finds it working.
+    pgo: PGO_MODE=generate builds an instrumented tree writing its profile to PGO_DIR, PGO_MODE=use rebuilds it with the profile
+    (see pgo.sh). Both phases have to use the same build directory as GCC names the profile files after the object files
+    """
+    content = inspect.cleandoc("""
+    # optimized Release profiles
+    if(NOT CMAKE_BUILD_TYPE AND NOT CMAKE_CONFIGURATION_TYPES)
+      set(CMAKE_BUILD_TYPE Release CACHE STRING "Choose the type of build" FORCE)
+    endif()
+    """)
+    if use_ipo:
+        content += "\n\n" + inspect.cleandoc("""
+        # interprocedural optimization
+        include(CheckIPOSupported)
+        check_ipo_supported(RESULT IPO_SUPPORTED OUTPUT IPO_OUTPUT LANGUAGES CXX)
+        if(IPO_SUPPORTED)
+          set(CMAKE_INTERPROCEDURAL_OPTIMIZATION_RELEASE ON)
+          set(CMAKE_INTERPROCEDURAL_OPTIMIZATION_RELWITHDEBINFO ON)
+        else()
+          message(WARNING "Interprocedural optimization is not supported: ${IPO_OUTPUT}")
+        endif()
+        """)
+    if use_pgo:
+        content += "\n\n" + inspect.cleandoc("""
+        # profile guided optimization (pgo.sh)
+        set(PGO_MODE "" CACHE STRING "Profile guided optimization phase (generate or use)")
+        set_property(CACHE PGO_MODE PROPERTY STRINGS "" generate use)
+        set(PGO_DIR "${CMAKE_CURRENT_SOURCE_DIR}/.pgo" CACHE PATH "Directory of the profile data")
+        if(PGO_MODE STREQUAL "generate")
+          add_compile_options(-fprofile-generate=${PGO_DIR})
+          add_link_options(-fprofile-generate=${PGO_DIR})
+        elseif(PGO_MODE STREQUAL "use")
+          if(CMAKE_CXX_COMPILER_ID MATCHES "Clang")
+            # the raw profiles are merged by pgo.sh
+            add_compile_options(-fprofile-use=${PGO_DIR}/default.profdata -Wno-profile-instr-unprofiled)
+          else()
+            # code not reached by the training runs is optimized as usual
+            add_compile_options(-fprofile-use=${PGO_DIR} -fprofile-correction -Wno-missing-profile)
+          endif()
+        elseif(NOT PGO_MODE STREQUAL "")
+          message(FATAL_ERROR "PGO_MODE should be generate, use or empty, got ${PGO_MODE}")
+        endif()
+        """)
+    return content
+
+def pgo_script_content(use_swig_python):
+    # instrumented build, training runs, optimized rebuild in the same build directory
+    install_python = "cmake --build build --target install-python\n" if use_swig_python else ""
+    return inspect.cleandoc(f"""
+    #! /bin/sh
+    # profile guided optimization, set PGO_TRAINING to the training scripts to run (default: {" ".join(training_scripts)})
+    set -e
+
+    rm -rf .pgo
+    mkdir -p build
+    cmake -B build -S . -DCMAKE_BUILD_TYPE=Release -DPGO_MODE=generate "$@"
+    cmake --build build
+    """) + "\n" + install_python + "\n" + inspect.cleandoc(f"""
+    # a failing training run still leaves a usable profile
+    for script in ${{PGO_TRAINING:-{" ".join(training_scripts)}}}; do
+      if [ -f "$script" ]; then
+        echo "training: $script"
+        sh "./$script" || echo "training run $script failed"
+      fi
+    done
+
+    # clang writes raw profiles that have to be merged
+    if ls .pgo/*.profraw >/dev/null 2>&1; then
+      llvm-profdata merge -output=.pgo/default.profdata .pgo/*.profraw
+    fi
+
+    cmake -B build -S . -DPGO_MODE=use
+    cmake --build build
+    """) + "\n"
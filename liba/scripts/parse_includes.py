@@ -1,38 +1,140 @@
-import re
+import contextlib
+import mmap
 import os
+import re
+
+# files larger than this are scanned through mmap instead of being read into memory
+mmap_threshold = 1 << 20
+
+# tokens of the include lexer. The file is scanned in a single pass and the leftmost token wins,
+# so directives inside comments and string/char literals are never matched.
+# Every token starts with one of \n / " ' so the text in between is skipped by the regex engine
+# whitespace of a directive line, block comments can precede the # and its name (/* c */ #include /* c */ "a.h")
+# the comment body can not extend past the first */ so a failed match does not backtrack into later comments
+space = rb"(?:[ \t]|/\*(?:[^*]|\*(?!/))*\*/)*"
+
+directive = rb"""
+    \n""" + space + rb"""\#""" + space + rb"""(?P<directive>\w*)(?P<rest>(?:[^\n\\/]|\\.|/\*.*?\*/|//[^\n]*|/)*)
+"""
+
+literal = rb"""
+  | //(?:[^\n\\]|\\\r?\n|\\.)*
+  | /\*.*?(?:\*/|\Z)
+  | "(?<=R")(?P<delimiter>[^()\\ \t\r\n]{0,16})\(.*?\)(?P=delimiter)"
+  | "(?:[^"\\\n]|\\.)*"
+  | '(?:(?<![\w.]')|(?<=[^\w][uUL]')|(?<=[^\w]u8'))(?:[^'\\\n]|\\.)*'
+"""
+
+lexer = re.compile(directive + literal, re.DOTALL | re.VERBOSE)
+
+# the include preamble ends at the first token that is not a directive, comment or whitespace
+preamble_lexer = re.compile(directive + literal + rb"""
+  | (?P<code>\S)
+""", re.DOTALL | re.VERBOSE)
+
+# directive on the first line of the file
+first_directive_lexer = re.compile(directive.replace(rb"\n", b"", 1), re.DOTALL | re.VERBOSE)
 
-def get_uncommented_lines(string):
-    # remove all occurrences streamed comments (/*COMMENT */) from string
-    string = re.sub(re.compile("/\*.*?\*/",re.DOTALL ) ,"" ,string)
-    # remove all occurrence single-line comments (//COMMENT\n ) from string
-    string = re.sub(re.compile("//.*?\n" ) ,"" ,string)
-    return [line for line in string.split("\n") if not re.match(r'^\s*$', line)]
-
-def find_includes(file_path):
-    with open(file_path) as f:
-        regex = "^\\s*#\\s*include\\s+[<\"][^>\"]*[>\"]\\s*"
-        text = "\n".join(f.readlines())
-        lines = get_uncommented_lines(text)
-        includes = []
-        for line in lines:
-            match = re.match(regex, line)
-            if match:
-                include = match.group(0)
-                if re.match('.*".*".*', include):
-                    includes.append('"' + include.split('"')[1] + '"')
-                elif re.match('.*<.*>.*', include):
-                    includes.append(include[include.index('<'):include.index('>') + 1])
-        return includes
+include_regex = re.compile(space + rb'([<"][^>"\n]*[>"])')
+# the rest of a CRLF line ends with \r
+if_zero_regex = re.compile(space + rb'0[ \t\r]*(?:/[/*].*)?$', re.DOTALL)
+if_one_regex = re.compile(space + rb'1[ \t\r]*(?:/[/*].*)?$', re.DOTALL)
+guard_regex = re.compile(rb'(?:\s|//[^\n]*|/\*.*?\*/)*\#[ \t]*(?:pragma[ \t]+once|ifndef[ \t]+(\w+)\s*\#[ \t]*define[ \t]+\1\b)', re.DOTALL)
+
+@contextlib.contextmanager
+def open_buffer(file_path):
+    # the content of the file as bytes, large files are mapped instead of being copied
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < mmap_threshold:
+            yield f.read()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+
+def tokenize(text, preamble):
+    # (directive, rest) pairs of the preprocessor directives, (None, None) marks the first code token in preamble mode
+    first = first_directive_lexer.match(text)
+    if first:
+        yield first.group("directive", "rest")
+    pos = first.end() if first else 0
+    if not preamble:
+        # findall keeps the tokens in C, only the directives reach the python loop
+        for directive, rest, _ in lexer.findall(text, pos):
+            if directive:
+                yield directive, rest
+        return
+    for match in preamble_lexer.finditer(text, pos):
+        if match.lastgroup == "code":
+            yield None, None
+        elif match.group("directive"):
+            yield match.group("directive", "rest")
+
+def find_includes_in_text(text, preamble=False):
+    """
+    returns the include directives of a C++ source as a list of "path" and <path> strings
+
+    comments, string/char/raw string literals and #if 0 regions are skipped.
+    If preamble is set, scanning stops at the first token that is not a comment or a preprocessor directive.
+    """
+    if isinstance(text, str):
+        text = text.encode()
+    includes = []
+    # each frame of the #if stack: [current branch is dead, #else branch is dead]
+    conditions = []
+    skipping = False
+    for directive, rest in tokenize(text, preamble):
+        if directive is None:
+            if not skipping:
+                break
+            continue
+        if directive == b"include":
+            if not skipping:
+                include = include_regex.match(rest)
+                if include:
+                    includes.append(include.group(1).decode(errors="replace"))
+            continue
+        if directive == b"if":
+            if if_zero_regex.match(rest):
+                conditions.append([True, False])
+            elif if_one_regex.match(rest):
+                conditions.append([False, True])
+            else:
+                conditions.append([False, False])
+        elif directive in (b"ifdef", b"ifndef"):
+            conditions.append([False, False])
+        elif conditions and directive == b"elif":
+            # branches after #if 1 are dead, the condition of the others is unknown so they are scanned
+            conditions[-1] = [True, True] if conditions[-1][1] else [False, False]
+        elif conditions and directive == b"else":
+            conditions[-1] = [conditions[-1][1], conditions[-1][1]]
+        elif conditions and directive == b"endif":
+            conditions.pop()
+        else:
+            continue
+        skipping = any(condition[0] for condition in conditions)
+    return includes
+
+def has_include_guard(file_path):
+    # #pragma once or #ifndef X #define X at the top of the header
+    try:
+        with open_buffer(file_path) as buffer:
+            return guard_regex.match(buffer) is not None
+    except OSError:
+        return True
+
+def find_includes(file_path, preamble=False):
+    with open_buffer(file_path) as buffer:
+        return find_includes_in_text(buffer, preamble)
 
 if __name__ == "__main__":
     import argparse
 
     argparser = argparse.ArgumentParser()
     argparser.add_argument('--path', type=str, required=False, help="path to file to parse")
+    argparser.add_argument('--preamble', action='store_true', required=False, default=False, help="stop at the end of the include preamble")
     args = vars(argparser.parse_args())
     file_path = args["path"]
-    
-    includes = find_includes(file_path)
-    print(includes)
-
 
+    includes = find_includes(file_path, args["preamble"])
+    print(includes)
@@ -0,0 +1,160 @@
+import glob
+import os
+import subprocess
+
+# upper bound of the headers visited when measuring the closure of a system header
+max_closure_files = 5000
+
+search_dirs = None
+closures = {}
+
+def system_include_dirs():
+    # #include <...> search path of the C++ compiler ($CXX or c++), empty if the compiler can not be run
+    global search_dirs
+    if search_dirs is None:
+        search_dirs = []
+        compiler = os.environ.get("CXX", "c++")
+        try:
+            output = subprocess.run([compiler, "-x", "c++", "-E", "-v", "-"], input="", stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, universal_newlines=True).stderr
+        except OSError:
+            return search_dirs
+        listing = False
+        for line in output.splitlines():
+            if line.startswith("#include <...> search starts here:"):
+                listing = True
+            elif line.startswith("End of search list."):
+                break
+            elif listing:
+                search_dirs.append(os.path.normpath(line.strip()))
+    return search_dirs
+
+def resolve(include, including_dir=None):
+    """
+    path of a system header and whether it is on the default search path of the compiler
+
+    quoted includes are looked up next to the including file first. Qt module headers (<QColor>) are looked up
+    under the qt5/qt6 module folders of the search path, these are only available to targets linking the Qt library
+    """
+    if including_dir is not None:
+        path = os.path.join(including_dir, include)
+        if os.path.isfile(path):
+            return path, True
+    for search_dir in system_include_dirs():
+        path = os.path.join(search_dir, include)
+        if os.path.isfile(path):
+            return path, True
+    for search_dir in system_include_dirs():
+        for path in sorted(glob.glob(os.path.join(search_dir, "qt[56]", "Qt*", include))):
+            return path, False
+    return None, False
+
+def system_closure(include, find_includes):
+    """
+    files read by the compiler for #include <include>, empty if the header is not found
+
+    find_includes returns the include directives of a file (the include cache of the generator)
+    """
+    if include in closures:
+        return closures[include]
+    path, _ = resolve(include)
+    visited = set()
+    stack = [path] if path else []
+    while stack and len(visited) < max_closure_files:
+        path = stack.pop()
+        if path in visited:
+            continue
+        visited.add(path)
+        for incl in find_includes(path):
+            included, _ = resolve(incl[1:-1], os.path.dirname(path) if incl.startswith('"') else None)
+            if included and not included in visited:
+                stack.append(included)
+    closures[include] = frozenset(visited)
+    return closures[include]
+
+def measure(files):
+    # (number of files, bytes) of a header closure
+    return len(files), sum(os.path.getsize(path) for path in files)
+
+def rank(units, closure, count, shared):
+    """
+    chooses the precompiled headers of a library directory
+
+    units: translation unit name -> {header: is available to every target (system headers on the default search path)}
+    closure: header -> files of its transitive closure
+    count: maximum number of headers to choose
+    shared: the precompiled header is reused by several targets (file granularity), so the headers that are not available
+    to every target have to be reached by every translation unit
+
+    headers are ranked by the number of translation units reaching them multiplied by the size of their closure.
+    returns (chosen, rejected), lists of dictionaries with the measurements and the reason of the decision
+    """
+    reached = {}
+    available = {}
+    for headers in units.values():
+        for header, is_available in headers.items():
+            reached[header] = reached.get(header, 0) + 1
+            available[header] = is_available
+    candidates = []
+    for header, num_units in reached.items():
+        files, size = measure(closure(header))
+        candidates.append({"header": header, "units": num_units, "files": files, "bytes": size, "score": num_units * size})
+    candidates.sort(key=lambda candidate: (-candidate["score"], candidate["header"]))
+
+    chosen = []
+    rejected = []
+    for candidate in candidates:
+        if candidate["units"] < 2:
+            candidate["reason"] = "reached by a single translation unit"
+        elif candidate["bytes"] == 0:
+            candidate["reason"] = "not found on the include path of the compiler"
+        elif shared and not available[candidate["header"]] and candidate["units"] < len(units):
+            candidate["reason"] = "shared by the targets of the directory but not reached by each of them"
+        elif len(chosen) >= count:
+            candidate["reason"] = f"ranked below the top {count}"
+        else:
+            candidate["reason"] = f"reached by {candidate['units']} of {len(units)} translation units, {candidate['files']} files / {candidate['bytes']} bytes each"
+            chosen.append(candidate)
+            continue
+        rejected.append(candidate)
+    return chosen, rejected
+
+def pch_content(targets, chosen, name):
+    """
+    CMake script of the precompiled headers of a library directory
+
+    a single target compiles its own precompiled header. Several targets (file granularity) reuse the header compiled by
+    an object library with the include directories of the first target. A library of the directory can not be the donor:
+    REUSE_FROM makes the other targets depend on it, a cycle if the donor links one of them
+    """
+    if not chosen or not targets:
+        return ""
+    headers = [candidate["header"] for candidate in chosen]
+    # system headers first
+    headers = sorted(headers, key=lambda header: not header.startswith("<"))
+    headers = "".join(f"  {header}\n" if header.startswith("<") else f'  [["{header}"]]\n' for header in headers)
+    content = "# precompiled headers (see build/pch_report.txt)\n"
+    if len(targets) == 1:
+        return content + f"target_precompile_headers({targets[0]} PRIVATE\n{headers})\n\n"
+    content += "if(NOT EXISTS ${CMAKE_CURRENT_BINARY_DIR}/pch.cpp)\n"
+    content += "  file(WRITE ${CMAKE_CURRENT_BINARY_DIR}/pch.cpp \"\")\n"
+    content += "endif()\n"
+    content += f"add_library({name} OBJECT ${{CMAKE_CURRENT_BINARY_DIR}}/pch.cpp)\n"
+    content += f"set_target_properties({name} PROPERTIES POSITION_INDEPENDENT_CODE ON)\n"
+    content += f"target_include_directories({name} PRIVATE $<TARGET_PROPERTY:{targets[0]},INCLUDE_DIRECTORIES>)\n"
+    content += f"target_precompile_headers({name} PRIVATE\n{headers})\n"
+    for target in targets:
+        content += f"target_precompile_headers({target} REUSE_FROM {name})\n"
+    return content + "\n"
+
+def report_content(choices):
+    # text report of the choices, choices: library directory -> (translation units, chosen, rejected)
+    lines = ["precompiled headers ranked by translation units reaching the header * bytes of its transitive closure", ""]
+    for rpath, (num_units, chosen, rejected) in sorted(choices.items()):
+        lines.append(f"{rpath} ({num_units} translation units)")
+        for candidate in chosen:
+            lines.append(f"  + {candidate['header']:<40} score {candidate['score']:>10}  {candidate['reason']}")
+        for candidate in rejected[:10]:
+            lines.append(f"  - {candidate['header']:<40} score {candidate['score']:>10}  {candidate['reason']}")
+        lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,178 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+class Span:
+    # trace event of a single operation (library directory, parsed file, written file)
+    __slots__ = ("timer", "name", "category", "args", "start")
+
+    def __init__(self, timer, name, category, args):
+        self.timer = timer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add_event(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+class NullSpan:
+    # returned by PhaseTimer.span when tracing is disabled
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+null_span = NullSpan()
+
+class PhaseTimer:
+    """
+    wall clock time spent in the phases of the generator
+
+    phases are exclusive: entering a phase pauses the enclosing one, so the phase times add up to the total run time
+    (apart from the time spent outside of any phase). Counters record the size of the work (libraries, files etc.).
+
+    if enabled (--profile, --trace) spans of single operations are recorded as well (Chrome trace event format).
+    Otherwise span returns a shared no-op context manager so the instrumentation costs a method call.
+    """
+
+    def __init__(self, enabled=False):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.maxima = {}
+        # [name, time entered or resumed, time entered]
+        self.stack = []
+        self.enabled = enabled
+        self.events = []
+        self.pid = os.getpid()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        now = time.perf_counter()
+        if self.stack:
+            self.pause(now)
+        self.stack.append([name, now, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.pause(now)
+            entered = self.stack.pop()[2]
+            if self.stack:
+                self.stack[-1][1] = now
+            if self.enabled:
+                self.add_event(name, "phase", entered, now, {})
+
+    def pause(self, now):
+        name, resumed, _ = self.stack[-1]
+        self.phases[name] = self.phases.get(name, 0.0) + now - resumed
+
+    def span(self, name, category, **args):
+        return Span(self, name, category, args) if self.enabled else null_span
+
+    def add_event(self, name, category, start, end, args):
+        # complete event, timestamps are in microseconds
+        self.events.append({"name": name, "cat": category, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6,
+            "pid": self.pid, "tid": 0, "args": args})
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def maximum(self, name, value):
+        self.maxima[name] = max(self.maxima.get(name, value), value)
+
+    def reset(self):
+        # drops the spans and counters a forked worker process inherited from the main process
+        self.pid = os.getpid()
+        self.events, self.counters, self.maxima = [], {}, {}
+
+    def take(self):
+        # events and counters recorded in a worker process since the last call, merged into the main process with merge
+        taken = (self.events, self.counters, self.maxima)
+        self.events, self.counters, self.maxima = [], {}, {}
+        return taken
+
+    def merge(self, taken):
+        events, counters, maxima = taken
+        self.events += events
+        for name, value in counters.items():
+            self.count(name, value)
+        for name, value in maxima.items():
+            self.maximum(name, value)
+
+    def slowest(self, category, limit):
+        # (name, seconds) of the slowest spans of the category
+        times = {}
+        for event in self.events:
+            if event["cat"] == category:
+                times[event["name"]] = times.get(event["name"], 0.0) + event["dur"] / 1e6
+        return sorted(times.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def report(self):
+        total = time.perf_counter() - self.start
+        report = {
+            "total": total,
+            "phases": dict(self.phases),
+            "other": total - sum(self.phases.values()),
+            "counters": dict(self.counters, **self.maxima),
+            "peak_rss_kb": peak_rss_kb()
+        }
+        if self.enabled:
+            report["slowest_libraries"] = self.slowest("library", 10)
+        return report
+
+    def save(self, location):
+        with open(location, 'w') as f:
+            f.write(json.dumps(self.report(), indent=2, sort_keys=True))
+
+    def save_trace(self, location):
+        # can be opened in chrome://tracing or https://ui.perfetto.dev
+        pid = self.pid
+        now = time.perf_counter() * 1e6
+        pids = sorted({event["pid"] for event in self.events} | {pid})
+        metadata = [{"name": "process_name", "ph": "M", "pid": p, "tid": 0,
+            "args": {"name": "generate_cmake" if p == pid else f"worker {p}"}} for p in pids]
+        counters = [{"name": name, "ph": "C", "ts": now, "pid": pid, "tid": 0, "args": {name: value}}
+            for name, value in sorted(dict(self.counters, **self.maxima).items())]
+        trace = {"traceEvents": metadata + self.events + counters, "displayTimeUnit": "ms", "otherData": self.report()}
+        with open(location, 'w') as f:
+            f.write(json.dumps(trace))
+
+    def summary(self, limit=10):
+        report = self.report()
+        lines = [f"total: {report['total']:.3f}s"]
+        for name, seconds in sorted(report["phases"].items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<12} {seconds:9.3f}s {100.0 * seconds / report['total']:5.1f}%")
+        if self.enabled:
+            lines.append("slowest libraries:")
+            for name, seconds in self.slowest("library", limit):
+                lines.append(f"  {seconds:9.3f}s  {name}")
+        lines.append("counters:")
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f"  {name:<24} {value}")
+        rss = report["peak_rss_kb"]
+        if rss:
+            lines.append(f"peak rss: {rss['self'] / 1024:.1f} MB (workers: {rss['children'] / 1024:.1f} MB)")
+        return "\n".join(lines)
+
+def peak_rss_kb():
+    # peak resident set size of the generator and of its worker processes (None where the resource module is missing)
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    scale = 1024 if sys.platform == "darwin" else 1
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+    return {"self": own, "children": children}
@@ -0,0 +1,116 @@
+import fnmatch
+import json
+import os
+
+# special folder names under the project root (see README)
+special_folders = {"external", "build", "scripts", "python", "apps", "cmake"}
+
+ignore_file = ".cmakegenignore"
+
+index_version = 1
+
+def read_ignore_patterns(root):
+    """
+    reads the patterns of directories to skip from <root>/.cmakegenignore
+
+    one pattern per line, lines starting with # are comments.
+    patterns without / are matched against directory names (for example vendor*),
+    patterns with / are matched against paths relative to the root (for example A/AB/third_party)
+    """
+    patterns = []
+    try:
+        with open(os.path.join(root, ignore_file), 'r') as f:
+            for line in f.readlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    patterns.append(line.strip("/"))
+    except OSError:
+        pass
+    return patterns
+
+def is_ignored(rpath, name, patterns):
+    # external libraries and hidden folders are never scanned
+    if name == "external" or name.startswith("."):
+        return True
+    for pattern in patterns:
+        if "/" in pattern:
+            if fnmatch.fnmatch(rpath.replace(os.path.sep, "/"), pattern):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+def list_dir(path):
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+def scan(root):
+    """
+    walks the project folders once with os.scandir, excluded directories are pruned before descending
+
+    returns the project index:
+    folders: project folders under the root
+    lib_dirs: library roots, directories with an include or apps folder
+    libraries: file names under src, apps, swig and include/<rpath> of each library root
+    generated: CMakeLists.txt and *.h.in files found in the project folders (not written to the index file)
+    directories: every visited directory (not written to the index file)
+    """
+    patterns = read_ignore_patterns(root)
+    folders = []
+    generated = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.name in special_folders and not is_ignored(entry.name, entry.name, patterns):
+                    folders.append(entry.name)
+            elif entry.name.endswith(".h.in"):
+                generated.append(entry.name)
+    folders.sort()
+
+    libraries = {}
+    directories = []
+    stack = list(reversed(folders))
+    while stack:
+        rpath = stack.pop()
+        directories.append(rpath)
+        subdirs = []
+        with os.scandir(os.path.join(root, rpath)) as entries:
+            for entry in entries:
+                curr_rpath = os.path.join(rpath, entry.name)
+                if entry.is_dir():
+                    if not is_ignored(curr_rpath, entry.name, patterns):
+                        subdirs.append(entry.name)
+                elif entry.name == "CMakeLists.txt" or entry.name.endswith(".h.in"):
+                    generated.append(curr_rpath)
+        if "include" in subdirs or "apps" in subdirs:
+            path = os.path.join(root, rpath)
+            libraries[rpath] = {
+                "src": list_dir(os.path.join(path, "src")),
+                "apps": list_dir(os.path.join(path, "apps")),
+                "swig": list_dir(os.path.join(path, "swig")),
+                "include": list_dir(os.path.join(path, "include", rpath))
+            }
+        stack.extend(os.path.join(rpath, name) for name in sorted(subdirs, reverse=True))
+
+    return {
+        "version": index_version,
+        "folders": folders,
+        "lib_dirs": sorted(libraries.keys()),
+        "libraries": libraries,
+        "generated": sorted(generated),
+        "directories": directories
+    }
+
+def index_content(index):
+    # serialized project index, read by create_cmake_options.py at configure time instead of rescanning the disk
+    return json.dumps({k: v for k, v in index.items() if not k in ("generated", "directories")}, indent=1, sort_keys=True)
+
+def read_index(location):
+    try:
+        with open(location, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == index_version else None
@@ -0,0 +1,90 @@
+import inspect
+import os
+
+# extension module of the swig interface swig/<name>.i (see add_swig_content)
+def extension_file(name):
+    return f"_{name}SWIG.so"
+
+def packages(modules):
+    """
+    python packages of the wrapped modules
+
+    modules: library directory (rpath) -> names of its swig interfaces
+    returns package path (tuple of folders, () is the top level package) -> (subpackages, modules)
+    """
+    tree = {(): (set(), set())}
+    for rpath, names in modules.items():
+        if not names:
+            continue
+        folders = tuple(rpath.split(os.path.sep))
+        for i in range(len(folders)):
+            tree.setdefault(folders[:i + 1], (set(), set()))
+            tree[folders[:i]][0].add(folders[i])
+        tree[folders][1].update(names)
+    return {path: (sorted(subpackages), sorted(names)) for path, (subpackages, names) in tree.items()}
+
+def init_content(subpackages, modules):
+    """
+    __init__.py of a package exposing its subpackages and wrapped modules lazily (PEP 562 module __getattr__)
+
+    nothing is imported with the package, a wrapped module (and its _<name>SWIG.so extension with the libraries it links)
+    is loaded on first access. The files are resolved next to the __init__.py so the import system does not search for them
+    """
+    entries = "".join(f'    "{name}": ("{name}.py", "{extension_file(name)}"),\n' for name in modules)
+    packages = "".join(f'    "{name}",\n' for name in subpackages)
+    return inspect.cleandoc('''
+    # generated by scripts/generate_cmake.py, wrapped modules and subpackages are imported on first access
+    import importlib.util
+    import os
+    import sys
+
+    _directory = os.path.dirname(os.path.abspath(__file__))
+
+    # module name -> (python proxy, extension)
+    _modules = {
+    %s}
+
+    _subpackages = (
+    %s)
+
+    __all__ = sorted(list(_modules) + list(_subpackages))
+
+    def _load(name, location, search_locations=None):
+        if not os.path.exists(location):
+            # not built (or not installed)
+            raise ModuleNotFoundError(f"No module named {name!r}, {location} has not been built", name=name, path=location)
+        spec = importlib.util.spec_from_file_location(name, location, submodule_search_locations=search_locations)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+        return module
+
+    def _import(name):
+        if name in _subpackages:
+            location = os.path.join(_directory, name)
+            return _load(f"{__name__}.{name}", os.path.join(location, "__init__.py"), [location])
+        proxy, extension = _modules[name]
+        extension_name = f"{__name__}.{os.path.splitext(extension)[0]}"
+        if not extension_name in sys.modules:
+            try:
+                _load(extension_name, os.path.join(_directory, extension))
+            except ImportError:
+                # the proxy imports the extension under an other name, it is found next to the proxy
+                pass
+        return _load(f"{__name__}.{name}", os.path.join(_directory, proxy))
+
+    def __getattr__(name):
+        if name in _modules or name in _subpackages:
+            full_name = f"{__name__}.{name}"
+            module = sys.modules.get(full_name) or _import(name)
+            globals()[name] = module
+            return module
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+    ''') % (entries, packages) + "\n"
@@ -11,17 +11,10 @@ def find_package_content():
                 find_commands += f"find_package(Qt5 REQUIRED COMPONENTS {lib})\n"
         return "# Find the QtWidgets library\n" + find_commands + "set(CMAKE_AUTOMOC ON)\nset(CMAKE_AUTOUIC ON)\nset(CMAKE_AUTORCC ON)\n"
 
-def add_qt_lib_content(rpath):
-    return inspect.cleandoc(f"""
-    # create qt libraries
-    file(GLOB QTFILES "src/*.ui")
+def add_qt_lib_content(ui_files):
+    # ui_files: set() command listing the .ui files under src and apps
+    return "# create qt libraries\n" + ui_files + "\n" + inspect.cleandoc(f"""
     foreach(QTFILE ${{QTFILES}})
       cmake_path(GET QTFILE STEM NAME)
-      add_library(ui_${{NAME}} src/${{NAME}}.ui)
-    endforeach()
-    
-    file(GLOB QTFILES "apps/*.ui")
-    foreach(QTFILE ${{QTFILES}})
-      cmake_path(GET QTFILE STEM NAME)
-      add_library(ui_${{NAME}} apps/${{NAME}}.ui)
+      add_library(ui_${{NAME}} ${{QTFILE}})
     endforeach()""") + "\n\n"
@@ -0,0 +1,46 @@
+import fnmatch
+import os
+
+nothread_file = "swig_nothread.txt"
+
+def read_nothread_patterns(scripts_dir):
+    """
+    reads the swig interfaces to build without -threads from scripts/swig_nothread.txt
+
+    one pattern per line, lines starting with # are comments.
+    patterns are matched against the path of the interface relative to the project root (for example A/AA/AAA/swig/*.i)
+    """
+    patterns = []
+    try:
+        with open(os.path.join(scripts_dir, nothread_file), 'r') as f:
+            for line in f.readlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    patterns.append(line)
+    except OSError:
+        pass
+    return patterns
+
+def swig_flags(use_threads, use_builtin, use_fast):
+    # -threads releases the GIL around every wrapped call, -builtin creates python types without proxy classes,
+    # -fastdispatch and -O shorten the overload dispatch and the generated wrappers
+    flags = []
+    if use_threads:
+        flags.append("-threads")
+    if use_builtin:
+        flags.append("-builtin")
+    if use_fast:
+        flags += ["-fastdispatch", "-O"]
+    return flags
+
+def flags_content(rpath, interfaces, flags, patterns, source="swig/${NAME}.i"):
+    # SWIG_FLAGS of the interfaces, the ones matching a nothread pattern keep the GIL. source is the swig source of an interface
+    lines = []
+    for interface in interfaces:
+        interface_flags = flags
+        if any(fnmatch.fnmatch(f"{rpath}/{interface}".replace(os.path.sep, "/"), pattern) for pattern in patterns):
+            interface_flags = [flag for flag in flags if flag != "-threads"]
+        if interface_flags:
+            name = os.path.splitext(os.path.basename(interface))[0]
+            lines.append(f'set_source_files_properties({source.replace("${NAME}", name)} PROPERTIES SWIG_FLAGS "{";".join(interface_flags)}")')
+    return "\n".join(lines)
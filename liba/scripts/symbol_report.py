@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import struct
+import sys
+
+# exported dynamic symbols of the built shared libraries and swig modules, compared with a baseline
+# (for example the build before --hidden_visibility)
+
+baseline_file = "symbol_baseline.json"
+
+SHT_DYNSYM = 11
+SHN_UNDEF = 0
+# STB_GLOBAL, STB_WEAK, STB_GNU_UNIQUE
+exported_bindings = {1, 2, 10}
+# STV_DEFAULT, STV_PROTECTED
+exported_visibilities = {0, 3}
+
+def read_dynamic_symbols(location):
+    """
+    (exported symbols, bytes of the dynamic symbol and string tables) of an ELF shared object, None if it is not one
+
+    a symbol is exported if it is defined in the object with global, weak or unique binding and default or protected visibility
+    """
+    with open(location, 'rb') as f:
+        data = f.read()
+    if data[:4] != b"\x7fELF":
+        return None
+    is_64 = data[4] == 2
+    order = "<" if data[5] == 1 else ">"
+    if is_64:
+        shoff, = struct.unpack_from(order + "Q", data, 0x28)
+        shentsize, shnum = struct.unpack_from(order + "HH", data, 0x3A)
+        section_format = order + "IIQQQQIIQQ"
+    else:
+        shoff, = struct.unpack_from(order + "I", data, 0x20)
+        shentsize, shnum = struct.unpack_from(order + "HH", data, 0x2E)
+        section_format = order + "IIIIIIIIII"
+    sections = [struct.unpack_from(section_format, data, shoff + i * shentsize) for i in range(shnum)]
+    for _, sh_type, _, _, sh_offset, sh_size, sh_link, _, _, sh_entsize in sections:
+        if sh_type != SHT_DYNSYM:
+            continue
+        exported = 0
+        for offset in range(sh_offset + sh_entsize, sh_offset + sh_size, sh_entsize):
+            if is_64:
+                _, info, other, shndx = struct.unpack_from(order + "IBBH", data, offset)
+            else:
+                info, other, shndx = struct.unpack_from(order + "BBH", data, offset + 12)
+            if shndx != SHN_UNDEF and info >> 4 in exported_bindings and other & 3 in exported_visibilities:
+                exported += 1
+        return exported, sh_size + sections[sh_link][5]
+    return 0, 0
+
+def collect(build_dir):
+    # shared objects of the build directory (libraries and swig modules) -> {"exported": count, "bytes": size}
+    results = {}
+    for root, dirs, files in os.walk(build_dir):
+        dirs[:] = sorted(name for name in dirs if name != "CMakeFiles")
+        for name in sorted(files):
+            location = os.path.join(root, name)
+            if not ".so" in name or os.path.islink(location):
+                continue
+            symbols = read_dynamic_symbols(location)
+            if symbols is not None:
+                results[os.path.relpath(location, build_dir)] = {"exported": symbols[0], "bytes": symbols[1]}
+    return results
+
+def report(current, baseline):
+    width = max((len(name) for name in current), default=0)
+    print(f"{'shared object':<{width}} {'exported':>9} {'baseline':>9} {'change':>8} {'symtab':>9}")
+    totals = [0, 0, 0]
+    for name, entry in sorted(current.items()):
+        before = baseline.get(name)
+        totals[0] += entry["exported"]
+        totals[2] += entry["bytes"]
+        if before is None:
+            print(f"{name:<{width}} {entry['exported']:>9} {'':>9} {'new':>8} {entry['bytes']:>8}B")
+            continue
+        totals[1] += before["exported"]
+        change = entry["exported"] / before["exported"] - 1.0 if before["exported"] else 0.0
+        print(f"{name:<{width}} {entry['exported']:>9} {before['exported']:>9} {change:>+8.1%} {entry['bytes']:>8}B")
+    print(f"{len(current)} shared objects export {totals[0]} symbols ({totals[2]} bytes of dynamic symbol tables)"
+        + (f", {totals[1]} in the baseline" if baseline else ""))
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('build', type=str, nargs='?', default="build", help="build directory")
+    argparser.add_argument('--baseline', type=str, required=False, default=baseline_file, help="results to compare with")
+    argparser.add_argument('--save-baseline', action='store_true', required=False, default=False, help="store the results as the baseline")
+    args = argparser.parse_args()
+
+    current = collect(args.build)
+    if not current:
+        print(f"There are no shared objects under {args.build}, build the project first.")
+        sys.exit(1)
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    with open(os.path.join(args.build, "symbol_report.json"), 'w') as f:
+        json.dump(current, f, indent=1, sort_keys=True)
+    report(current, baseline)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=1, sort_keys=True)
+        print(f"baseline: {args.baseline} has been saved")
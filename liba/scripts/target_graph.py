@@ -0,0 +1,164 @@
+import json
+import re
+
+# object files of a target in the Ninja log: <rpath>/CMakeFiles/<CMake target>.dir/src/<name>.cpp.o
+object_regex = re.compile(r'CMakeFiles/([^/]+)\.dir/')
+
+def read_ninja_log(location):
+    """
+    compile time of each CMake target in seconds measured by a previous Ninja build (build/.ninja_log), empty if there is none
+
+    targets are named after their object directory: <project>.<namespace><target> for libraries and executables,
+    <name>SWIG for swig modules and <project> for the library of the object granularity.
+    The log is appended by every build so the last entry of an output is used
+    """
+    outputs = {}
+    try:
+        with open(location, 'r') as f:
+            for line in f.readlines():
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) == 5 and not line.startswith("#"):
+                    start, end, _, output, _ = fields
+                    outputs[output] = (int(end) - int(start)) / 1000.0
+    except (OSError, ValueError):
+        return {}
+    times = {}
+    for output, seconds in outputs.items():
+        match = object_regex.search(output)
+        if match:
+            times[match.group(1)] = times.get(match.group(1), 0.0) + seconds
+    return times
+
+def weigh(nodes):
+    """
+    sets the weight of the nodes, returns the unit and the targets whose compile time was estimated
+
+    measured compile times are used where there are any, the other targets get the bytes they read scaled by the
+    seconds per byte of the measured targets. Without measurements the nodes are weighted by bytes
+    """
+    measured = [node for node in nodes.values() if node["seconds"] is not None]
+    if not measured:
+        for node in nodes.values():
+            node["weight"] = node["bytes"]
+        return "bytes read by the compiler", []
+    measured_bytes = sum(node["bytes"] for node in measured)
+    rate = sum(node["seconds"] for node in measured) / measured_bytes if measured_bytes else 0.0
+    estimated = []
+    for target, node in nodes.items():
+        if node["seconds"] is None:
+            node["weight"] = node["bytes"] * rate
+            estimated.append(target)
+        else:
+            node["weight"] = node["seconds"]
+    return "compile seconds (build/.ninja_log)", sorted(estimated)
+
+def analyze(nodes, edges, limit=10):
+    """
+    critical path and parallelism of the target graph
+
+    nodes: target -> attributes, "weight" is the cost of building the target (measured seconds or estimated bytes)
+    edges: target -> targets it links (they are built before it)
+
+    the critical path is the most expensive chain of targets that have to be built one after the other (a target is built
+    after the targets it links), no amount of parallel jobs builds the project faster. The achievable parallelism is the total cost divided by the critical path cost.
+    Bottlenecks are the targets of the critical path ranked by the number of targets waiting for them (transitive dependents)
+    """
+    finish = {}
+    depth = {}
+    previous = {}
+    # iterative depth first search, links back to a target being visited (cycles) are ignored
+    for root in sorted(nodes):
+        if root in finish:
+            continue
+        visiting = {root}
+        work = [(root, iter(sorted(edges.get(root, ()))))]
+        while work:
+            target, successors = work[-1]
+            descended = False
+            for successor in successors:
+                if successor in nodes and not successor in finish and not successor in visiting:
+                    visiting.add(successor)
+                    work.append((successor, iter(sorted(edges.get(successor, ())))))
+                    descended = True
+                    break
+            if descended:
+                continue
+            work.pop()
+            visiting.discard(target)
+            done = [successor for successor in edges.get(target, ()) if successor in finish]
+            slowest = max(done, key=lambda successor: (finish[successor], successor), default=None)
+            finish[target] = nodes[target]["weight"] + (finish[slowest] if slowest else 0)
+            depth[target] = 1 + max((depth[successor] for successor in done), default=0)
+            previous[target] = slowest
+
+    dependents = {target: set() for target in nodes}
+    for target in nodes:
+        for successor in edges.get(target, ()):
+            if successor in dependents:
+                dependents[successor].add(target)
+    # transitive dependents, targets are visited from the deepest ones
+    waiting = {}
+    for target in sorted(nodes, key=lambda target: -depth[target]):
+        waiting[target] = set(dependents[target])
+        for dependent in dependents[target]:
+            waiting[target] |= waiting.get(dependent, set())
+
+    end = max(nodes, key=lambda target: (finish[target], target), default=None)
+    path = []
+    while end:
+        path.append(end)
+        end = previous[end]
+    path.reverse()
+    total = sum(node["weight"] for node in nodes.values())
+    length = finish[path[-1]] if path else 0
+    bottlenecks = sorted(path, key=lambda target: (-len(waiting[target]) * nodes[target]["weight"], target))[:limit]
+    return {
+        "critical_path": path,
+        "critical_path_weight": length,
+        "total_weight": total,
+        "parallelism": total / length if length else 0.0,
+        "max_depth": max(depth.values(), default=0),
+        "depth": depth,
+        "bottlenecks": [{"target": target, "depth": depth[target], "weight": nodes[target]["weight"],
+            "dependents": len(waiting[target])} for target in bottlenecks]
+    }
+
+def json_content(nodes, edges, analysis):
+    graph = {"nodes": nodes, "edges": {target: sorted(links) for target, links in edges.items()}, "analysis": analysis}
+    return json.dumps(graph, indent=1, sort_keys=True)
+
+def dot_content(nodes, edges, analysis):
+    # Graphviz, the critical path is drawn in red (dot -Tsvg build/target_graph.dot -o target_graph.svg)
+    shapes = {"library": "box", "executable": "ellipse", "swig": "hexagon"}
+    path = analysis["critical_path"]
+    critical = set(path)
+    critical_links = set(zip(path[1:], path))
+    lines = ["digraph targets {", "  rankdir=LR;", "  node [fontsize=10];"]
+    for target, node in sorted(nodes.items()):
+        label = f"{target}\\n{node['units']} TU, {node['bytes']} bytes"
+        if node["seconds"] is not None:
+            label += f", {node['seconds']:.2f}s"
+        color = ' color=red' if target in critical else ''
+        lines.append(f'  "{target}" [label="{label}" shape={shapes[node["kind"]]}{color}];')
+    for target, links in sorted(edges.items()):
+        for link in sorted(links):
+            color = ' [color=red]' if (target, link) in critical_links else ''
+            lines.append(f'  "{target}" -> "{link}"{color};')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def text_content(nodes, analysis, unit, estimated=()):
+    lines = [f"targets: {len(nodes)}, weight: {unit}",
+        f"total weight: {analysis['total_weight']:.6g}",
+        f"critical path weight: {analysis['critical_path_weight']:.6g} ({len(analysis['critical_path'])} targets)",
+        f"achievable parallelism: {analysis['parallelism']:.2f} jobs",
+        f"maximum dependency depth: {analysis['max_depth']}", "", "critical path (built first to last):"]
+    for target in analysis["critical_path"]:
+        lines.append(f"  {nodes[target]['weight']:>14.6g}  {target}")
+    lines += ["", "bottlenecks on the critical path (weight * targets waiting for them):"]
+    for entry in analysis["bottlenecks"]:
+        lines.append(f"  {entry['target']}: depth {entry['depth']}, {entry['dependents']} dependent targets, weight {entry['weight']:.6g}")
+    if estimated:
+        lines += ["", "targets without a compile time in build/.ninja_log (estimated from the bytes they read):"]
+        lines += [f"  {target}" for target in estimated]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+import fnmatch
+import os
+import re
+from parse_includes import has_include_guard
+
+# static functions/variables, anonymous namespaces and macros defined in a source file are internal to its translation unit.
+# Two sources with the same internal name can not be merged into one unity source file
+static_regex = re.compile(r'^[ \t]*static\s+(?:(?:inline|const|constexpr|volatile|thread_local)\s+)*[\w:<>,\s\*&]*?\b(\w+)\s*(?:\(|=|;|\[|\{)', re.MULTILINE)
+anonymous_namespace_regex = re.compile(r'\bnamespace\s*\{')
+definition_regex = re.compile(r'\b(?:class|struct|union|enum(?:\s+class)?|using)\s+(\w+)|\b(\w+)\s*(?:\([^;{]*\)\s*(?:const\s*)?\{|=|;)')
+macro_regex = re.compile(r'^[ \t]*#[ \t]*define[ \t]+(\w+)', re.MULTILINE)
+comment_regex = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:[^"\\\n]|\\.)*"', re.DOTALL)
+
+exclude_file = "unity_exclude.txt"
+
+def read_exclude_patterns(scripts_dir):
+    """
+    reads the source files to keep out of unity builds from scripts/unity_exclude.txt
+
+    one pattern per line, lines starting with # are comments.
+    patterns are matched against the path of the source file relative to the project root (for example A/AA/AAA/src/*.cpp)
+    """
+    patterns = []
+    try:
+        with open(os.path.join(scripts_dir, exclude_file), 'r') as f:
+            for line in f.readlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    patterns.append(line)
+    except OSError:
+        pass
+    return patterns
+
+def is_excluded(rpath, patterns):
+    rpath = rpath.replace(os.path.sep, "/")
+    return any(fnmatch.fnmatch(rpath, pattern) for pattern in patterns)
+
+def anonymous_namespace_names(text):
+    # names declared directly inside anonymous namespaces
+    names = set()
+    for match in anonymous_namespace_regex.finditer(text):
+        depth = 1
+        pos = match.end()
+        body = []
+        start = pos
+        while depth and pos < len(text):
+            if text[pos] == "{":
+                if depth == 1:
+                    body.append(text[start:pos + 1])
+                depth += 1
+            elif text[pos] == "}":
+                depth -= 1
+                if depth == 1:
+                    start = pos + 1
+            pos += 1
+        body.append(text[start:pos - 1])
+        for definition in definition_regex.finditer(" ".join(body)):
+            names.add(definition.group(1) or definition.group(2))
+    return names
+
+def internal_symbols(file_path):
+    # names with internal linkage defined by a source file (overapproximated, a false positive only splits a batch)
+    try:
+        with open(file_path, 'r', errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return set()
+    macros = set(macro_regex.findall(text))
+    text = comment_regex.sub(" ", text)
+    return set(static_regex.findall(text)) | anonymous_namespace_names(text) | macros
+
+def batches(sources, symbols, batch_size):
+    """
+    splits sources into unity batches of at most batch_size files
+
+    sources are assigned in order to the first batch that does not define any of their internal symbols,
+    so files with conflicting static functions, anonymous namespace members or macros are never merged
+    """
+    groups = []
+    for source in sources:
+        for group in groups:
+            if len(group["sources"]) < batch_size and not group["symbols"] & symbols[source]:
+                group["sources"].append(source)
+                group["symbols"] |= symbols[source]
+                break
+        else:
+            groups.append({"sources": [source], "symbols": set(symbols[source])})
+    return [group["sources"] for group in groups]
+
+def unity_content(target, sources, batch_size, patterns, cmake_root, rpath, includes):
+    """
+    CMake script enabling the unity build of a target with the given sources (relative to the library directory)
+
+    includes: header files reached by each source, headers without include guard are treated as internal symbols
+    so two sources including the same one are not merged.
+    the batches are computed here and passed to CMake as unity groups (UNITY_BUILD_MODE GROUP),
+    excluded sources get SKIP_UNITY_BUILD_INCLUSION. Targets with a single source are left untouched
+    """
+    excluded = [source for source in sources if is_excluded(os.path.join(rpath, source), patterns)]
+    included = [source for source in sources if not source in excluded]
+    if len(included) <= 1:
+        return ""
+    guards = {}
+    symbols = {}
+    for source in included:
+        symbols[source] = internal_symbols(os.path.join(cmake_root, rpath, source))
+        for header in includes[source]:
+            if not header in guards:
+                guards[header] = not header.endswith(".h") or has_include_guard(header)
+            if not guards[header]:
+                symbols[source].add(header)
+    name = target.split("}")[-1]
+    content = ""
+    for i, batch in enumerate(batches(included, symbols, batch_size)):
+        # a batch of a single file is compiled on its own
+        if len(batch) > 1:
+            content += f"set_source_files_properties({' '.join(batch)} PROPERTIES UNITY_GROUP {name}_unity_{i})\n"
+    if not content:
+        return ""
+    if excluded:
+        content += f"set_source_files_properties({' '.join(excluded)} PROPERTIES SKIP_UNITY_BUILD_INCLUSION ON)\n"
+    return f"set_target_properties({target} PROPERTIES UNITY_BUILD ON UNITY_BUILD_MODE GROUP)\n" + content + "\n"
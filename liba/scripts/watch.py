@@ -0,0 +1,157 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+import project_scanner
+
+# files whose creation, removal or renaming can change the project layout
+layout_extensions = (".h", ".cpp", ".i", ".ui")
+
+def stat_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class PollingWatcher:
+    """
+    detects changes by comparing the mtime and size of the watched files and the mtime of the watched directories
+
+    a directory changes when an entry is created, removed or renamed in it (the layout might have changed)
+    """
+
+    name = "polling"
+
+    def __init__(self, files, directories, interval):
+        self.interval = interval
+        self.update(files, directories)
+
+    def update(self, files, directories):
+        self.files = {path: stat_key(path) for path in files}
+        self.directories = {path: stat_key(path) for path in directories}
+
+    def poll(self):
+        changed = set()
+        for path, key in self.files.items():
+            current = stat_key(path)
+            if current != key:
+                self.files[path] = current
+                changed.add(path)
+        layout_changed = False
+        for path, key in self.directories.items():
+            current = stat_key(path)
+            if current != key:
+                self.directories[path] = current
+                layout_changed = True
+        return changed, layout_changed
+
+    def wait(self):
+        # blocks until something changed, returns (changed files, layout changed)
+        while True:
+            time.sleep(self.interval)
+            changed, layout_changed = self.poll()
+            if changed or layout_changed:
+                return changed, layout_changed
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """
+    Linux inotify through ctypes, every watched directory gets a watch and the events of its entries are filtered
+
+    events are collected until the directories are quiet for interval seconds (editors write a file in several steps)
+    """
+
+    name = "inotify"
+
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = os.O_CLOEXEC
+
+    content_mask = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+    layout_mask = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    event_header = struct.Struct("iIII")
+
+    def __init__(self, files, directories, interval):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.interval = interval
+        self.fd = -1
+        self.update(files, directories)
+
+    def update(self, files, directories):
+        # the watches are created again as directories might have been added or removed
+        self.close()
+        self.fd = self.libc.inotify_init1(InotifyWatcher.IN_NONBLOCK | InotifyWatcher.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.files = set(files)
+        self.all_files = set(files)
+        self.directories = {}
+        for directory in directories:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), InotifyWatcher.content_mask | InotifyWatcher.layout_mask)
+            if wd >= 0:
+                self.directories[wd] = directory
+
+    def read_events(self, changed):
+        layout_changed = False
+        try:
+            buffer = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = InotifyWatcher.event_header.unpack_from(buffer, offset)
+            name = os.fsdecode(buffer[offset + InotifyWatcher.event_header.size:offset + InotifyWatcher.event_header.size + length].rstrip(b"\0"))
+            offset += InotifyWatcher.event_header.size + length
+            if mask & InotifyWatcher.IN_Q_OVERFLOW:
+                # events were lost, every file is checked
+                changed.update(self.all_files)
+                layout_changed = True
+                continue
+            directory = self.directories.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if path in self.files:
+                changed.add(path)
+            if mask & InotifyWatcher.layout_mask and (mask & InotifyWatcher.IN_ISDIR or not name or name.endswith(layout_extensions)
+                or name == project_scanner.ignore_file):
+                layout_changed = True
+        return layout_changed
+
+    def wait(self):
+        while True:
+            changed = set()
+            select.select([self.fd], [], [])
+            layout_changed = self.read_events(changed)
+            while select.select([self.fd], [], [], self.interval)[0]:
+                layout_changed |= self.read_events(changed)
+            if changed or layout_changed:
+                return changed, layout_changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def create_watcher(files, directories, interval, use_inotify=True):
+    # inotify if the platform has it, polling otherwise
+    if use_inotify:
+        try:
+            return InotifyWatcher(files, directories, interval)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(files, directories, interval)
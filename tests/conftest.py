@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the generator modules are scripts of liba/scripts, imported the same way generate_cmake.py imports them
+scripts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "liba", "scripts")
+sys.path.insert(0, scripts_dir)
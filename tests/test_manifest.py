@@ -0,0 +1,72 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from manifest import Manifest, content_hash
+
+liba = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "liba")
+
+def record(tmp_path, files):
+    output = tmp_path / "CMakeLists.txt"
+    output.write_text("content")
+    manifest = Manifest(str(tmp_path / "manifest.json"), "options")
+    manifest.record("A/AA", {path: content_hash(text) for path, text in files.items()}, "content")
+    manifest.save()
+    return str(output)
+
+def test_up_to_date(tmp_path):
+    output = record(tmp_path, {"a.h": "a", "b.h": "b"})
+    files = {"a.h": "a", "b.h": "b"}
+    manifest = Manifest(str(tmp_path / "manifest.json"), "options")
+    assert manifest.is_up_to_date("A/AA", output, lambda path: content_hash(files[path]))
+    assert not manifest.is_up_to_date("B/BA", output, lambda path: content_hash(files[path]))
+
+def test_changed_input(tmp_path):
+    output = record(tmp_path, {"a.h": "a", "b.h": "b"})
+    files = {"a.h": "a", "b.h": "changed"}
+    manifest = Manifest(str(tmp_path / "manifest.json"), "options")
+    assert not manifest.is_up_to_date("A/AA", output, lambda path: content_hash(files[path]))
+
+def test_removed_input(tmp_path):
+    output = record(tmp_path, {"a.h": "a"})
+    manifest = Manifest(str(tmp_path / "manifest.json"), "options")
+    assert not manifest.is_up_to_date("A/AA", output, lambda path: None)
+
+def test_changed_output(tmp_path):
+    output = record(tmp_path, {"a.h": "a"})
+    with open(output, 'w') as f:
+        f.write("edited")
+    manifest = Manifest(str(tmp_path / "manifest.json"), "options")
+    assert not manifest.is_up_to_date("A/AA", output, lambda path: content_hash("a"))
+
+def test_changed_options(tmp_path):
+    output = record(tmp_path, {"a.h": "a"})
+    manifest = Manifest(str(tmp_path / "manifest.json"), "other options")
+    assert manifest.dirty
+    assert not manifest.is_up_to_date("A/AA", output, lambda path: content_hash("a"))
+
+def generate(root):
+    # number of library directories rendered by an incremental generation
+    result = subprocess.run([sys.executable, os.path.join("scripts", "generate_cmake.py"), "--incremental", "--profile"],
+        cwd=root, capture_output=True, text=True, check=True)
+    return int(re.search(r"^\s*rendered\s+(\d+)$", result.stdout, re.M).group(1))
+
+def test_transitive_header_change(tmp_path):
+    # A/AB/ABA/aba.h is included by A/AA/AAA/aaa.h, not by the sources of A/AA/AAA
+    root = tmp_path / "liba"
+    shutil.copytree(liba, root, ignore=shutil.ignore_patterns("build", "__pycache__"))
+    assert generate(root) == 7
+    assert generate(root) == 0
+
+    with open(root / "build" / ".cmakegen" / "manifest.json", 'r') as f:
+        data = json.load(f)
+    paths = [path for path, _ in data["files"]]
+    assert "A/AB/ABA/include/A/AB/ABA/aba.h" in [paths[i] for i in data["libraries"]["A/AA/AAA"]["inputs"]]
+
+    with open(root / "A" / "AB" / "ABA" / "include" / "A" / "AB" / "ABA" / "aba.h", 'a') as f:
+        f.write("\n#include <map>\n")
+    assert generate(root) == 1
+    assert generate(root) == 0
@@ -0,0 +1,31 @@
+import pytest
+from parse_includes import find_includes_in_text
+
+@pytest.mark.parametrize("text, includes", [
+    (b'#include "a.h"\n#include <b.h>\n', ['"a.h"', '<b.h>']),
+    # comments around the directive
+    (b'#include /* c */ "a.h"\n', ['"a.h"']),
+    (b'/* c */ #include "a.h"\n', ['"a.h"']),
+    (b'int x;\n/* c */ # /* c */ include <a.h> // "b.h"\n', ['<a.h>']),
+    (b'/* multi\n   line */ #include "a.h"\n', ['"a.h"']),
+    # directives inside comments and literals
+    (b'/* #include "a.h" */\n// #include "b.h"\nconst char* s = "#include \\"c.h\\"";\n#include "d.h"\n', ['"d.h"']),
+    (b'auto s = R"x(\n#include "a.h"\n)x";\n#include "b.h"\n', ['"b.h"']),
+    # #if 0 regions, with LF and CRLF line ends
+    (b'#if 0\n#include "a.h"\n#endif\n#include "b.h"\n', ['"b.h"']),
+    (b'#if 0\r\n#include "a.h"\r\n#endif\r\n#include "b.h"\r\n', ['"b.h"']),
+    (b'#if /* c */ 0 // c\r\n#include "a.h"\r\n#endif\r\n', []),
+    (b'#if 1\r\n#include "a.h"\r\n#else\r\n#include "b.h"\r\n#endif\r\n', ['"a.h"']),
+    (b'#if 0\n#include "a.h"\n#else\n#include "b.h"\n#endif\n', ['"b.h"']),
+    (b'#ifdef X\n#include "a.h"\n#elif 0\n#include "b.h"\n#endif\n', ['"a.h"', '"b.h"']),
+])
+def test_find_includes(text, includes):
+    assert find_includes_in_text(text) == includes
+
+def test_preamble_stops_at_code():
+    text = b'/* c */ #include "a.h"\n#include "b.h"\nint x;\n#include "c.h"\n'
+    assert find_includes_in_text(text, preamble=True) == ['"a.h"', '"b.h"']
+    assert find_includes_in_text(text) == ['"a.h"', '"b.h"', '"c.h"']
+
+def test_str_input():
+    assert find_includes_in_text('#include "a.h"\n') == ['"a.h"']
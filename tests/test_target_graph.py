@@ -0,0 +1,52 @@
+import target_graph
+
+def write_log(tmp_path, entries):
+    location = tmp_path / ".ninja_log"
+    lines = ["# ninja log v5"] + [f"{start}\t{end}\t0\t{output}\t0" for start, end, output in entries]
+    location.write_text("\n".join(lines) + "\n")
+    return str(location)
+
+def test_read_ninja_log_targets(tmp_path):
+    location = write_log(tmp_path, [
+        (0, 1000, "A/AA/AAA/CMakeFiles/liba.A.AA.AAA.aaa.dir/src/aaa.cpp.o"),
+        (0, 500, "A/AA/AAA/CMakeFiles/liba.A.AA.AAA.AAA.dir/src/aaa.cpp.o"),
+        (0, 250, "A/AA/AAA/CMakeFiles/liba.A.AA.AAA.AAA.dir/src/aaa2.cpp.o"),
+        (0, 2000, "A/AA/AAA/CMakeFiles/aaaSWIG.dir/aaaPYTHON_wrap.cxx.o"),
+        (0, 100, "CMakeFiles/liba.dir/dummy.cpp.o"),
+        # links are not compile times
+        (0, 300, "lib/libliba.A.AA.AAA.aaa.so"),
+    ])
+    assert target_graph.read_ninja_log(location) == {
+        "liba.A.AA.AAA.aaa": 1.0, "liba.A.AA.AAA.AAA": 0.75, "aaaSWIG": 2.0, "liba": 0.1}
+
+def test_read_ninja_log_last_entry(tmp_path):
+    # every build appends to the log, the last entry of an output counts
+    output = "A/CMakeFiles/liba.A.a.dir/src/a.cpp.o"
+    location = write_log(tmp_path, [(0, 4000, output), (5000, 6000, output)])
+    assert target_graph.read_ninja_log(location) == {"liba.A.a": 1.0}
+
+def test_read_ninja_log_missing(tmp_path):
+    assert target_graph.read_ninja_log(str(tmp_path / ".ninja_log")) == {}
+
+def node(size, seconds):
+    return {"bytes": size, "seconds": seconds}
+
+def test_weigh_estimates_missing_targets():
+    nodes = {"a": node(100, 1.0), "b": node(300, 2.0), "c": node(200, None)}
+    unit, estimated = target_graph.weigh(nodes)
+    assert unit.startswith("compile seconds")
+    assert estimated == ["c"]
+    assert [nodes[target]["weight"] for target in "abc"] == [1.0, 2.0, 1.5]
+
+def test_weigh_bytes_without_log():
+    nodes = {"a": node(100, None), "b": node(300, None)}
+    unit, estimated = target_graph.weigh(nodes)
+    assert unit == "bytes read by the compiler" and estimated == []
+    assert [nodes[target]["weight"] for target in "ab"] == [100, 300]
+
+def test_critical_path():
+    nodes = {"lib": {"weight": 3}, "exe": {"weight": 1}, "other": {"weight": 2}}
+    edges = {"exe": {"lib"}, "other": set(), "lib": set()}
+    analysis = target_graph.analyze(nodes, edges)
+    assert analysis["critical_path"] == ["lib", "exe"]
+    assert analysis["critical_path_weight"] == 4